@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import sys
+
+import pygame
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(ROOT, ".asset_cache")
+MANIFEST = os.path.join(CACHE_DIR, "manifest.json")
+
+ICON_SIZE = (20, 20)
+ICON_FILES = {
+    '♠': "spade.png",
+    '♥': "heart.png",
+    '♦': "diamond.png",
+    '♣': "club.png",
+}
+
+
+def _read_manifest():
+    try:
+        with open(MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_manifest(manifest):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = MANIFEST + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp, MANIFEST)
+    except OSError:
+        pass  # A read-only install just rebuilds in memory every start
+
+def _stat_key(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+def _sources_digest(manifest):
+    """sha1 over the icon PNGs, rehashing only files whose size or mtime changed
+
+    Returns the digest and whether the manifest's source entries changed.
+    """
+    known = manifest.setdefault("sources", {})
+    digest = hashlib.sha1()
+    changed = False
+    for name in ICON_FILES.values():
+        path = os.path.join(ROOT, name)
+        entry = known.get(name)
+        if not entry or entry["stat"] != _stat_key(path):
+            with open(path, "rb") as f:
+                entry = known[name] = {"stat": _stat_key(path), "sha1": hashlib.sha1(f.read()).hexdigest()}
+            changed = True
+        digest.update(entry["sha1"].encode())
+    return digest.hexdigest()[:16], changed
+
+
+def build_atlas(size=ICON_SIZE, manifest=None):
+    """Scale the suit PNGs once into a single strip and cache it, return its path"""
+    manifest = _read_manifest() if manifest is None else manifest
+    w, h = size
+    path = os.path.join(CACHE_DIR, f"icons-{_sources_digest(manifest)[0]}-{w}x{h}.png")
+    atlas = pygame.Surface((w * len(ICON_FILES), h), pygame.SRCALPHA)
+    for i, name in enumerate(ICON_FILES.values()):
+        img = pygame.image.load(os.path.join(ROOT, name))
+        atlas.blit(pygame.transform.smoothscale(img, size), (i * w, 0))
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        pygame.image.save(atlas, path)
+    except (OSError, pygame.error):
+        pass
+    manifest.setdefault("atlases", {})[f"{w}x{h}"] = os.path.basename(path)
+    _write_manifest(manifest)
+    return path, atlas
+
+def load_suit_icons(size=ICON_SIZE):
+    """Suit -> icon surface, from the cached atlas when the sources are unchanged"""
+    manifest = _read_manifest()
+    w, h = size
+    digest, changed = _sources_digest(manifest)
+    name = f"icons-{digest}-{w}x{h}.png"
+    path = os.path.join(CACHE_DIR, name)
+    if manifest.get("atlases", {}).get(f"{w}x{h}") == name and os.path.exists(path):
+        atlas = pygame.image.load(path)
+        if changed:
+            _write_manifest(manifest)
+    else:
+        path, atlas = build_atlas(size, manifest)
+    if pygame.display.get_surface():
+        atlas = atlas.convert_alpha()
+    return {suit: atlas.subsurface((i * w, 0, w, h)) for i, suit in enumerate(ICON_FILES)}
+
+
+def font_path(name):
+    """Resolve a system font once and remember it, since the lookup scans installed fonts"""
+    manifest = _read_manifest()
+    fonts = manifest.setdefault("fonts", {})
+    if name not in fonts:
+        fonts[name] = pygame.font.match_font(name)  # None means pygame's default font
+        _write_manifest(manifest)
+    return fonts[name]
+
+class LazyFont:
+    """Stands in for pygame.font.SysFont(name, size) until first used"""
+    def __init__(self, name, size):
+        self.name = name
+        self.size_px = size
+        self._font = None
+
+    def load(self):
+        if self._font is None:
+            self._font = pygame.font.Font(font_path(self.name), self.size_px)
+        return self._font
+
+    def render(self, *args):
+        return self.load().render(*args)
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+if __name__ == "__main__":
+    # Build step: python assets.py [WxH ...]
+    pygame.init()
+    sizes = [tuple(int(v) for v in arg.split("x")) for arg in sys.argv[1:]] or [ICON_SIZE]
+    for size in sizes:
+        path, _ = build_atlas(size)
+        print(f"{path} ({os.path.getsize(path)} bytes)")
@@ -0,0 +1,110 @@
+import sys
+import time
+
+import numpy as np
+
+from evaluator import FLUSH_TABLE, STRAIGHT_TOP, RANKS, SUITS, encode, evaluate
+
+
+# Batched cards are plain indices: suit * 13 + rank index, the order Deck
+# builds its 52 cards in.
+def card_index(rank, suit):
+    return SUITS.index(suit) * 13 + RANKS.index(rank)
+
+INDEX_CODES = [encode(i % 13, i // 13) for i in range(52)]
+
+_BITS = 1 << np.arange(13, dtype=np.int64)
+_POPCOUNT = np.array([bin(m).count("1") for m in range(8192)], dtype=np.int64)
+# Highest rank value in a mask (0 for an empty mask)
+_HIGH = np.array([m.bit_length() + 1 if m else 0 for m in range(8192)], dtype=np.int64)
+_STRAIGHT = np.array(STRAIGHT_TOP, dtype=np.int64)
+_FLUSH = np.array(FLUSH_TABLE, dtype=np.int64)
+# Top five rank values of a mask packed as kickers
+_TOP5 = np.zeros(8192, dtype=np.int64)
+for _m in range(8192):
+    for _i, _v in enumerate([r + 2 for r in range(12, -1, -1) if _m >> r & 1][:5]):
+        _TOP5[_m] |= _v << (16 - 4 * _i)
+
+
+def _without_high(mask):
+    return mask & ~(1 << np.maximum(_HIGH[mask] - 2, 0))
+
+def _histogram(values, width):
+    n = values.shape[0]
+    flat = (values + width * np.arange(n)[:, None]).ravel()
+    return np.bincount(flat, minlength=n * width).reshape(n, width)
+
+
+def evaluate_batch(cards):
+    """Score an (N, 5|6|7) array of card indices, same ordering as evaluator.evaluate"""
+    cards = np.asarray(cards, dtype=np.int64)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+        raise ValueError(f"expected an (N, 5..7) array, got shape {cards.shape}")
+    ranks, suits = cards % 13, cards // 13
+
+    counts = _histogram(ranks, 13)
+    rank_mask = (counts > 0) @ _BITS
+    pair_mask = (counts == 2) @ _BITS
+    trip_mask = (counts == 3) @ _BITS
+    quad_mask = (counts >= 4) @ _BITS
+
+    suit_counts = _histogram(suits, 4)
+    flush_suit = suit_counts.argmax(axis=1)
+    in_suit = suits == flush_suit[:, None]
+    flush_mask = np.where(suit_counts.max(axis=1) >= 5, (in_suit.astype(np.int64) << ranks).sum(axis=1), 0)
+
+    # Second-best pair for a full house may come from a second set of trips
+    trip_high = _HIGH[trip_mask]
+    boat_pair = _HIGH[_without_high(trip_mask) | pair_mask]
+    pair_high = _HIGH[pair_mask]
+    pair_low = _HIGH[_without_high(pair_mask)]
+    straight = _STRAIGHT[rank_mask]
+
+    conditions = [
+        flush_mask > 0,
+        quad_mask > 0,
+        (trip_high > 0) & (boat_pair > 0),
+        straight > 0,
+        trip_high > 0,
+        _POPCOUNT[pair_mask] >= 2,
+        pair_high > 0,
+    ]
+    choices = [
+        _FLUSH[flush_mask],
+        7 << 20 | _HIGH[quad_mask] << 16,
+        6 << 20 | trip_high << 16 | boat_pair << 12,
+        4 << 20 | straight << 16,
+        3 << 20 | trip_high << 16,
+        2 << 20 | pair_high << 16 | pair_low << 12,
+        1 << 20 | pair_high << 16,
+    ]
+    return np.select(conditions, choices, default=_TOP5[rank_mask])
+
+
+def _check(n):
+    """Compare evaluate_batch with evaluator.evaluate on random 5/6/7-card hands"""
+    rng = np.random.default_rng()
+    ok = True
+    for k in (5, 6, 7):
+        cards = np.argsort(rng.random((n, 52)), axis=1)[:, :k]
+        got = evaluate_batch(cards)
+        expected = np.array([evaluate([INDEX_CODES[i] for i in row]) for row in cards.tolist()])
+        bad = int((got != expected).sum())
+        print(f"{k} cards: {n} hands, {bad} mismatches")
+        ok = ok and bad == 0
+    return ok
+
+def _bench(n):
+    rng = np.random.default_rng()
+    for k in (5, 6, 7):
+        cards = np.argsort(rng.random((n, 52)), axis=1)[:, :k]
+        start = time.perf_counter()
+        evaluate_batch(cards)
+        print(f"{k} cards: {n / (time.perf_counter() - start):,.0f} hands/s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _bench(200_000)
+    else:
+        sys.exit(0 if _check(200_000) else 1)
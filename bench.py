@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import engine
+from engine import Card, Game, evaluate5, evaluate_best5
+from evaluator import RANKS, SUITS, HandState, prepare_tables
+from multiseat import MultiGame, play_hand
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+
+def timeit(fn, repeat=3):
+    """Best wall time of fn() over repeat runs, in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_evaluator(results, scale):
+    rng = random.Random(1)
+    deck = [Card(r, s) for s in SUITS for r in RANKS]
+    n = 20000 * scale
+    hands5 = [rng.sample(deck, 5) for _ in range(n)]
+    t = timeit(lambda: [evaluate5(h) for h in hands5])
+    results["evaluate5_5cards"] = (n / t, "hands/s", True)
+    for k in (5, 6, 7):
+        hands = [rng.sample(deck, k) for _ in range(n)]
+        t = timeit(lambda: [evaluate_best5(h) for h in hands])
+        results[f"evaluate_best5_{k}cards"] = (n / t, "hands/s", True)
+
+
+def bench_cpu_action(results, scale):
+    """Latency of one cpu_action call at each street with the game's default budget"""
+    game = Game(seed=2)
+    game.first_player = 0
+    calls = 20 * scale
+    for revealed in (1, 2, 3, 4):
+        total = 0.0
+        for _ in range(calls):
+            game.p1.chips = game.p2.chips = 100
+            game.new_hand()
+            game.revealed = game.round = revealed
+            start = time.perf_counter()
+            game.cpu_action()
+            total += time.perf_counter() - start
+        results[f"cpu_action_street{revealed}_ms"] = (total / calls * 1000, "ms", False)
+
+
+def bench_hands(results, scale):
+    """Full hands through new_hand -> player actions -> next_round -> end_showdown"""
+    game = Game(cpu_budget_ms=None, cpu_samples=64, seed=3)
+    hands = 300 * scale
+    def play():
+        for i in range(hands):
+            game.p1.chips = game.p2.chips = 100
+            game.first_player = i % 2
+            game.new_hand()
+            while game.state == "playing":
+                game.player_call() or game.player_check() or game.player_fold()
+    results["hands_per_s"] = (hands / timeit(play, repeat=1), "hands/s", True)
+
+
+def bench_seats(results, scale):
+    """Computer self-play at 2-9 seats, and the showdown cost per live hand"""
+    hands = 100 * scale
+    for seats in (2, 3, 6, 9):
+        game = MultiGame([f"Seat {i + 1}" for i in range(seats)], seed=seats)
+        t = timeit(lambda: [play_hand(game) for _ in range(hands)], repeat=1)
+        results[f"multiseat_{seats}seats_ms"] = (t / hands * 1000, "ms", False)
+    rng = random.Random(5)
+    deck = [Card(r, s).code for s in SUITS for r in RANKS]
+    deals = [rng.sample(deck, 5 + 2 * 9) for _ in range(2000 * scale)]
+    def showdown():
+        for cards in deals:
+            board = HandState(cards[:5])
+            for k in range(5, len(cards), 2):
+                board.score_with(cards[k:k + 2])
+    per_seat = timeit(showdown) / (len(deals) * 9)
+    results["showdown_per_seat_us"] = (per_seat * 1e6, "us", False)
+
+
+def bench_render(results, scale):
+    """Full redraw of each main() state branch on an offscreen SDL dummy display"""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    try:
+        import Texas_Duel as ui
+    except ImportError as e:
+        print(f"skipping render benchmarks: {e}", file=sys.stderr)
+        return
+    game = Game(cpu_budget_ms=1, seed=4)
+    game.first_player = 0
+    def dice():
+        game.state = "dice"; game.dice_ready = True; game.dice_p1, game.dice_p2 = 5, 2
+    def raising():
+        game.state = "raise"; game.raise_text = "30"
+    def playing():
+        game.state = "playing"
+    states = [
+        ("welcome", lambda: None),
+        ("dice", dice),
+        ("playing", game.new_hand),
+        ("raise", raising),
+        ("playing_rules", lambda: (playing(), setattr(game, "rules_visible", True))),
+        ("result", game.player_fold),
+    ]
+    frames = 100 * scale
+    for name, setup in states:
+        setup()
+        def render():
+            for _ in range(frames):
+                ui.frame.invalidate()
+                ui.draw_scene(game)
+                ui.present()
+        results[f"render_{name}_ms"] = (timeit(render) / frames * 1000, "ms", False)
+
+
+GROUPS = {
+    "evaluator": bench_evaluator,
+    "cpu": bench_cpu_action,
+    "hands": bench_hands,
+    "seats": bench_seats,
+    "render": bench_render,
+}
+
+
+def compare(results, baseline, threshold):
+    """Print the change against baseline, return the names that regressed beyond threshold"""
+    regressions = []
+    for name, entry in results.items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            print(f"  {name:28}{entry['value']:14.3f} {entry['unit']:8} (new)")
+            continue
+        change = (entry["value"] - old["value"]) / old["value"]
+        worse = -change if entry["higher_is_better"] else change
+        flag = "  REGRESSION" if worse > threshold else ""
+        print(f"  {name:28}{entry['value']:14.3f} {entry['unit']:8}{change:+8.1%}{flag}")
+        if worse > threshold:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Texas Duel performance benchmarks")
+    parser.add_argument("groups", nargs="*", metavar="group",
+                        help=f"benchmark groups to run: {', '.join(GROUPS)} (default: all)")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="fail when a result is this much worse than baseline (default 0.15 = 15%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--scale", type=int, default=1, help="multiply iteration counts")
+    args = parser.parse_args()
+    unknown = [g for g in args.groups if g not in GROUPS]
+    if unknown:
+        parser.error(f"unknown group(s): {', '.join(unknown)}")
+
+    prepare_tables()
+    raw = {}
+    for name in args.groups or GROUPS:
+        print(f"running {name}...", file=sys.stderr)
+        GROUPS[name](raw, args.scale)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "preflop_table": engine.PREFLOP is not None,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {name: {"value": v, "unit": unit, "higher_is_better": hib} for name, (v, unit, hib) in raw.items()},
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=1)
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        baseline = {}
+    regressions = compare(report["results"], baseline, args.threshold)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"saved baseline to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
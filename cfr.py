@@ -0,0 +1,301 @@
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+
+from equity import FULL_DECK, estimate_equity
+from evaluator import evaluate
+import isomorph
+import preflop
+
+
+# Abstraction of the betting game the computer plays. Hands have four
+# betting streets with 1-4 community cards showing and a showdown after
+# the fifth. On each street Player 1 acts and then the computer; on the
+# first street the computer also opens when it won the dice.
+STREETS = 4
+BUCKETS = 8             # equity against a random hand, in eighths
+BUCKET_SAMPLES = 64     # Monte Carlo samples behind a bucket after the first street
+BUCKET_CACHE = 1 << 16  # isomorphism classes whose bucket is kept, see bucket()
+NEED_EDGES = (0, 10, 25, 50)
+POT_EDGES = (20, 50, 100, 200)
+RAISES = (10, 30, 80)
+FOLD, CALL = 0, 1       # then one action per raise size
+ACTIONS = 2 + len(RAISES)
+# (turn, turns on the street)
+POSITIONS = {(0, 2): 0, (1, 2): 1, (0, 3): 2, (1, 3): 3, (2, 3): 4}
+INFOSETS = STREETS * len(POSITIONS) * BUCKETS * (len(NEED_EDGES) + 1) * (len(POT_EDGES) + 1) * (len(RAISES) + 1)
+
+# File layout, little-endian:
+#   header   magic, version, abstraction (buckets, need/pot bucket counts, raise sizes), iterations
+#   table    uint8 action weights, ACTIONS per information set, all 0 where never reached
+MAGIC = b"TDCF"
+VERSION = 1
+LAYOUT = bytes([BUCKETS, len(NEED_EDGES) + 1, len(POT_EDGES) + 1, *RAISES]).ljust(8, b"\0")
+HEADER = struct.Struct("<4sH2x8sQ")
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cpu_strategy.bin")
+
+
+_buckets = {}
+
+
+def street_turns(street, first_player, seats=2):
+    """Seats in the order they act on a street: in seat order, after the first player opens the first street"""
+    if seats == 2:
+        return (1, 0, 1) if street == 1 and first_player == 1 else (0, 1)
+    order = tuple(range(seats))
+    return (first_player,) + order if street == 1 and first_player != 0 else order
+
+def _edge(value, edges):
+    for i, e in enumerate(edges):
+        if value <= e:
+            return i
+    return len(edges)
+
+def infoset(street, turn, turns, bucket, need, pot, chips):
+    """Dense index of an information set"""
+    i = (street - 1) * len(POSITIONS) + POSITIONS[(turn, turns)]
+    i = i * BUCKETS + bucket
+    i = i * (len(NEED_EDGES) + 1) + _edge(need, NEED_EDGES)
+    i = i * (len(POT_EDGES) + 1) + _edge(pot, POT_EDGES)
+    return i * (len(RAISES) + 1) + sum(r <= chips for r in RAISES)
+
+def legal(need, chips):
+    """Actions open to a seat that owes need with chips left; folding is only offered when facing a bet"""
+    actions = [CALL] if need <= 0 else [FOLD, CALL]
+    return actions + [2 + i for i, r in enumerate(RAISES) if r <= chips]
+
+def bucket(hole, board, table=None):
+    """Equity bucket of hole cards on the visible board, from the preflop table on the first street if given
+
+    Otherwise the equity is sampled once per suit-isomorphism class, on
+    the class's canonical cards with an RNG seeded by its index, so the
+    bucket is the same for every member of the class and can be kept.
+    """
+    if len(board) == 1 and table:
+        share = table.vs_random(preflop.class_of(*hole))
+        return min(int(share * BUCKETS), BUCKETS - 1)
+    k = len(board)
+    i = isomorph.index(hole, board)
+    key = i * 6 + k
+    b = _buckets.get(key)
+    if b is None:
+        hole, board = isomorph.unindex(k, i)
+        share = estimate_equity(hole, board, budget_ms=None, max_samples=BUCKET_SAMPLES, rng=random.Random(key)).share
+        b = min(int(share * BUCKETS), BUCKETS - 1)
+        if len(_buckets) >= BUCKET_CACHE:
+            _buckets.clear()
+        _buckets[key] = b
+    return b
+
+
+class StrategyTable:
+    """Read-only memory-mapped view of a table written by solve()"""
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, layout, self.iterations = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION or layout != LAYOUT or len(self._mm) != HEADER.size + INFOSETS * ACTIONS:
+            raise ValueError(f"{path} is not a version {VERSION} strategy table for this abstraction")
+        self._weights = memoryview(self._mm)[HEADER.size:]
+
+    def choose(self, index, actions, rng=random, lean=0.0):
+        """Sample one of actions by the table's weights, CALL where the set was never reached
+
+        lean scales the raise weights by 1 + lean and the fold weight by
+        1 - lean, so a positive lean plays looser than the table.
+        """
+        base = index * ACTIONS
+        weights = [self._weights[base + a] * (1 - lean if a == FOLD else 1 + lean if a > CALL else 1)
+                   for a in actions]
+        r = rng.random() * sum(weights)
+        for a, w in zip(actions, weights):
+            r -= w
+            if r < 0:
+                return a
+        return CALL
+
+def load(path=DEFAULT_PATH):
+    """Map the table at path, or None if it is missing or from another abstraction"""
+    try:
+        return StrategyTable(path)
+    except (OSError, ValueError):
+        return None
+
+
+# Solver: external-sampling Monte Carlo CFR with regret matching+
+class _Solver:
+    """Runs iterations against fixed regrets and collects the updates"""
+    def __init__(self, regrets, rng, table):
+        self.regrets = regrets
+        self.d_regret = array("d", bytes(8 * INFOSETS * ACTIONS))
+        self.d_strategy = array("d", bytes(8 * INFOSETS * ACTIONS))
+        self.rng = rng
+        self.table = table
+
+    def iterate(self):
+        rng = self.rng
+        deal = rng.sample(FULL_DECK, 9)
+        holes, board = (deal[0:2], deal[2:4]), deal[4:]
+        self.buckets = [[None] + [bucket(h, board[:k], self.table) for k in range(1, STREETS + 1)] for h in holes]
+        s0, s1 = evaluate(holes[0] + board), evaluate(holes[1] + board)
+        self.winner = 0 if s0 > s1 else 1 if s1 > s0 else None
+        self.first = rng.randrange(2)
+        # Stacks vary from hand to hand, so sample them rather than always 100/100
+        c0 = rng.randint(10, 190)
+        self.start = (c0, 200 - c0)
+        for t in (0, 1):
+            self.walk(t, 1, 0, self.start, (0, 0), 0, 0)
+
+    def payoff(self, t, chips, pot, winner):
+        won = pot if winner == t else pot / 2 if winner is None else 0
+        return chips[t] + won - self.start[t]
+
+    def walk(self, t, street, turn, chips, bets, pot, cur):
+        """Expected chips won by seat t from this point"""
+        turns = street_turns(street, self.first)
+        if turn == len(turns):
+            if street == STREETS:
+                return self.payoff(t, chips, pot, self.winner)
+            return self.walk(t, street + 1, 0, chips, (0, 0), pot, 0)
+        s = turns[turn]
+        if chips[s] < 10:
+            # cpu_action folds on low chips before consulting the table
+            return self.payoff(t, chips, pot, 1 - s)
+        need = cur - bets[s]
+        base = infoset(street, turn, len(turns), self.buckets[s][street], need, pot, chips[s]) * ACTIONS
+        actions = legal(need, chips[s])
+        positive = [max(self.regrets[base + a], 0.0) for a in actions]
+        total = sum(positive)
+        sigma = [p / total for p in positive] if total > 0 else [1 / len(actions)] * len(actions)
+        if s == t:
+            utils = [self.act(t, street, turn, chips, bets, pot, cur, s, a, need) for a in actions]
+            node = sum(p * u for p, u in zip(sigma, utils))
+            for a, u in zip(actions, utils):
+                self.d_regret[base + a] += u - node
+            return node
+        for a, p in zip(actions, sigma):
+            self.d_strategy[base + a] += p
+        a = self.rng.choices(actions, sigma)[0]
+        return self.act(t, street, turn, chips, bets, pot, cur, s, a, need)
+
+    def act(self, t, street, turn, chips, bets, pot, cur, s, a, need):
+        """Apply seat s's action the way Game.table_action does"""
+        if a == FOLD:
+            return self.payoff(t, chips, pot, 1 - s)
+        if a == CALL:
+            pay = min(max(need, 0), chips[s])
+        else:
+            pay = RAISES[a - 2]
+            cur = max(cur, pay)
+        chips = (chips[0] - pay, chips[1]) if s == 0 else (chips[0], chips[1] - pay)
+        bets = (bets[0] + pay, bets[1]) if s == 0 else (bets[0], bets[1] + pay)
+        return self.walk(t, street, turn + 1, chips, bets, pot + pay, cur)
+
+def _chunk(task):
+    regrets, iterations, seed = task
+    solver = _Solver(array("d", regrets), random.Random(seed), preflop.load())
+    for _ in range(iterations):
+        solver.iterate()
+    return solver.d_regret.tobytes(), solver.d_strategy.tobytes()
+
+
+# Checkpoint: magic, version, abstraction, iterations, then regrets and strategy sums as float64
+CHECKPOINT_MAGIC = b"TDCK"
+
+def _save_checkpoint(path, iterations, regrets, strategy):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(CHECKPOINT_MAGIC, VERSION, LAYOUT, iterations))
+        regrets.tofile(f)
+        strategy.tofile(f)
+    os.replace(tmp, path)
+
+def _load_checkpoint(path):
+    with open(path, "rb") as f:
+        magic, version, layout, iterations = HEADER.unpack(f.read(HEADER.size))
+        if magic != CHECKPOINT_MAGIC or version != VERSION or layout != LAYOUT:
+            raise ValueError(f"{path} is a checkpoint for another abstraction")
+        regrets, strategy = array("d"), array("d")
+        regrets.fromfile(f, INFOSETS * ACTIONS)
+        strategy.fromfile(f, INFOSETS * ACTIONS)
+    return iterations, regrets, strategy
+
+def export(path, iterations, strategy):
+    """Write the average strategy as a table, 255 split over the actions of each set"""
+    weights = bytearray(INFOSETS * ACTIONS)
+    for base in range(0, len(weights), ACTIONS):
+        total = sum(strategy[base:base + ACTIONS])
+        if total > 0:
+            for a in range(ACTIONS):
+                weights[base + a] = round(255 * strategy[base + a] / total)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, LAYOUT, iterations))
+        f.write(weights)
+    os.replace(tmp, path)
+
+
+def solve(path, minutes=None, iterations=None, workers=None, chunk=200, seed=0, checkpoint_minutes=5):
+    """Train in a process pool until the time or iteration limit, resuming from path.ckpt if present
+
+    Each round every worker runs chunk iterations against the current
+    regrets; the updates are summed, negative regrets floored (CFR+), and
+    the checkpoint and table rewritten every checkpoint_minutes.
+    """
+    import multiprocessing
+    ckpt = path + ".ckpt"
+    try:
+        done, regrets, strategy = _load_checkpoint(ckpt)
+        print(f"resuming from {done:,} iterations")
+    except FileNotFoundError:
+        done, regrets, strategy = 0, array("d", bytes(8 * INFOSETS * ACTIONS)), array("d", bytes(8 * INFOSETS * ACTIONS))
+    workers = workers or os.cpu_count()
+    start = last_save = time.time()
+    target = done + iterations if iterations else None
+    with multiprocessing.Pool(workers) as pool:
+        while True:
+            raw = regrets.tobytes()
+            tasks = [(raw, chunk, f"{seed}:{done}:{w}") for w in range(workers)]
+            for d_regret, d_strategy in pool.imap_unordered(_chunk, tasks):
+                for i, v in enumerate(array("d", d_regret)):
+                    if v:
+                        regrets[i] += v
+                for i, v in enumerate(array("d", d_strategy)):
+                    if v:
+                        strategy[i] += v
+            for i, v in enumerate(regrets):
+                if v < 0:
+                    regrets[i] = 0.0
+            done += chunk * workers
+            now = time.time()
+            finished = (target and done >= target) or (minutes and now - start >= minutes * 60)
+            if finished or now - last_save >= checkpoint_minutes * 60:
+                _save_checkpoint(ckpt, done, regrets, strategy)
+                export(path, done, strategy)
+                last_save = now
+            reached = sum(1 for base in range(0, len(strategy), ACTIONS) if any(strategy[base:base + ACTIONS]))
+            print(f"{done:,} iterations, {reached:,}/{INFOSETS:,} sets reached, "
+                  f"{done / max(now - start, 1e-9):,.0f} it/s", flush=True)
+            if finished:
+                return done
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the computer's strategy table with Monte Carlo CFR")
+    parser.add_argument("-o", "--output", default=DEFAULT_PATH)
+    parser.add_argument("--minutes", type=float, help="stop after this long")
+    parser.add_argument("--iterations", type=int, help="stop after this many more iterations")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=200, help="iterations per worker between merges")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if not (args.minutes or args.iterations):
+        parser.error("give --minutes or --iterations; training resumes from the checkpoint next to the output")
+    if preflop.load() is None:
+        print("note: no preflop_equity.bin, first-street buckets use Monte Carlo", file=sys.stderr)
+    solve(args.output, args.minutes, args.iterations, args.workers, args.chunk, args.seed)
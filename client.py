@@ -0,0 +1,169 @@
+import json
+import queue
+import socket
+import threading
+import time
+
+from engine import Card, Player
+
+
+REPLY_TIMEOUT = 5  # seconds the UI waits on the server before giving up on the table
+
+
+def parse_card(text):
+    return Card(text[:-1], text[-1])
+
+
+class RemoteGame:
+    """Stands in for engine.Game in the pygame UI while the table lives on server.py
+
+    The UI keeps its own screen state (welcome, dice animation, raise
+    entry, popups); everything about the hand comes from the server's
+    views. Requests block until answered, which on a LAN is well under a
+    frame; a server silent for REPLY_TIMEOUT closes the table. A reader
+    thread takes the replies and the pushes sent when the other human
+    acts, and calls on_update so the UI can wake up.
+    """
+    def __init__(self, host, port, mode="cpu", on_update=None):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile("rb")
+        self.on_update = on_update
+        self.replies = queue.Queue()
+        self.next_id = 0
+        self.lock = threading.Lock()
+        self.closed = None
+
+        self.state = "welcome"
+        self.p1 = Player("Player 1", True)
+        self.p2 = Player("Computer", False)
+        self.board = []
+        self.revealed = 0
+        self.round = 1
+        self.pot = 0
+        self.current_bet = 0
+        self.first_player = 0
+        self.first_turn = False
+        self.winner_msg = ""
+        self.p1_rank = self.p2_rank = ""
+        self.result_winner = None
+        self.result_net_gain = 0
+        self.dice_p1 = self.dice_p2 = 0
+        self.dice_ready = False
+        self.dice_animating = False
+        self.dice_timer = 0
+        self.log = []
+        self.rules_visible = False
+        self.popup_msg = None
+        self.popup_start = 0.0
+        self.raise_text = ""
+        self.server_state = None
+        self.hand_no = 0
+        self.your_turn = False
+
+        threading.Thread(target=self._read, daemon=True).start()
+        self.request("join", mode=mode)
+
+    def _read(self):
+        for line in self.file:
+            msg = json.loads(line)
+            if "push" in msg:
+                if msg["push"] == "closed":
+                    self.closed = msg.get("reason", "closed")
+                    self.notify(f"Table closed: {self.closed}")
+                else:
+                    self.apply(msg["view"])
+                if self.on_update:
+                    self.on_update()
+            else:
+                self.replies.put(msg)
+        self.closed = self.closed or "connection lost"
+        self.replies.put({"ok": False, "error": self.closed})
+
+    def request(self, op, **fields):
+        """Send one request and wait for its reply; errors become a popup"""
+        with self.lock:
+            self.next_id += 1
+            fields.update(id=self.next_id, op=op)
+            try:
+                self.sock.sendall(json.dumps(fields).encode() + b"\n")
+            except OSError as e:
+                self.closed = str(e)
+            reply = {"ok": False, "error": self.closed}
+            if not self.closed:
+                try:
+                    reply = self.replies.get(timeout=REPLY_TIMEOUT)
+                except queue.Empty:
+                    # Replies come in order, so a late one would answer the wrong
+                    # request: drop the connection rather than wait on it
+                    self.closed = "server not responding"
+                    try:
+                        self.sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+                    reply = {"ok": False, "error": self.closed}
+        if "view" in reply:
+            self.apply(reply["view"])
+        if not reply["ok"]:
+            self.notify(reply.get("error", "request failed"))
+        return reply["ok"]
+
+    def notify(self, text):
+        self.popup_msg = text
+        self.popup_start = time.time()
+
+    def apply(self, view):
+        """Copy a server view into the attributes draw_scene reads"""
+        me, other = self.p1, self.p2
+        me.name, other.name = view["names"]
+        me.chips, other.chips = view["chips"]
+        me.bet, other.bet = view["bets"]
+        me.hand = [parse_card(c) for c in view["hand"]]
+        other.hand = [parse_card(c) for c in view["opponent"]] or [None, None]
+        board = [parse_card(c) for c in view["board"]]
+        self.board = board + [None] * (5 - len(board)) if board else []
+        self.revealed = view["revealed"]
+        self.round = view["round"]
+        self.pot = view["pot"]
+        self.current_bet = view["owed"]
+        self.first_turn = view["first_turn"]
+        self.first_player = view["first"]
+        self.dice_p1, self.dice_p2 = view["dice"]
+        self.log = view["log"]
+        self.winner_msg = view["winner"]
+        self.p1_rank, self.p2_rank = view["ranks"]
+        self.result_winner = (me.name if view["you_won"] else other.name) if view["you_won"] is not None else None
+        self.result_net_gain = view["net_gain"]
+        self.your_turn = view["your_turn"]
+        # Follow the server into a new hand or its result, but leave the
+        # screens the UI runs by itself alone
+        changed = (view["state"], view["hand_no"]) != (self.server_state, self.hand_no)
+        self.server_state, self.hand_no = view["state"], view["hand_no"]
+        if changed and view["state"] in ("playing", "result") and not (self.state == "raise" and view["state"] == "playing"):
+            self.state = view["state"]
+
+    # The Game methods the UI calls
+    def roll_dice(self):
+        return self.request("roll") and self.dice_p1 != self.dice_p2
+
+    def new_hand(self):
+        if self.request("deal"):
+            self.state = self.server_state
+
+    def player_check(self):
+        return self.request("check")
+
+    def player_raise(self, amt):
+        return self.request("raise", amount=amt)
+
+    def player_call(self):
+        return self.request("call")
+
+    def player_fold(self):
+        return self.request("fold")
+
+    def close(self):
+        try:
+            self.request("leave")
+        finally:
+            self.sock.close()
@@ -0,0 +1,500 @@
+import random
+
+from evaluator import RANKS, SUITS, HandState, card_code, evaluate, score_to_tuple
+from equity import estimate_equity
+import cfr
+import history
+import opponents
+import preflop
+import profiler
+from streams import RngStream
+
+
+# Time the computer may spend estimating equity per decision
+CPU_BUDGET_MS = 8
+# Heads-up preflop equities, None until `python preflop.py` has been run
+PREFLOP = preflop.load()
+# Trained strategy, None until `python cfr.py` has been run
+STRATEGY = cfr.load()
+# Table weight moved from folding to raising per unit of read_opponent's shift
+TABLE_LEAN = 4
+
+RANK_VALUE = {r:i for i,r in enumerate(RANKS, start=2)}
+VALUE_TO_RANK = {v:r for r,v in RANK_VALUE.items()}
+
+
+# Card and card type evaluation module
+class Card:
+    """Immutable card; Card(rank, suit) hands back the shared instance from CARDS"""
+    __slots__ = ("rank", "suit", "code", "value")
+    _pool = {}
+
+    def __new__(cls, rank, suit):
+        card = cls._pool.get((rank, suit))
+        if card is None:
+            card = object.__new__(cls)
+            for name, v in (("rank", rank), ("suit", suit), ("code", card_code(rank, suit)), ("value", RANK_VALUE[rank])):
+                object.__setattr__(card, name, v)
+            cls._pool[(rank, suit)] = card
+        return card
+    def __setattr__(self, name, value):
+        raise AttributeError("cards are immutable")
+    def __reduce__(self):
+        return Card, (self.rank, self.suit)
+    def __str__(self):
+        return f"{self.rank}{self.suit}"
+
+# The process-wide pool, in card index order suit * 13 + rank
+CARDS = [Card(r, s) for s in SUITS for r in RANKS]
+
+class Deck:
+    """Deals from CARDS by a partial Fisher-Yates shuffle of an index array"""
+    def __init__(self, rng=random):
+        self.rng = rng
+        self.order = list(range(len(CARDS)))
+        self.left = len(self.order)
+    def reset(self):
+        # Any permutation is a fine starting point, so the order is not restored
+        self.left = len(self.order)
+    def draw(self, n):
+        order, rand, out = self.order, self.rng.random, []
+        left = self.left
+        for _ in range(n):
+            j = int(rand() * left)
+            left -= 1
+            order[j], order[left] = order[left], order[j]
+            out.append(CARDS[order[left]])
+        self.left = left
+        return out
+
+def evaluate_best5(cards7):
+    """Score the best 5-card combination from a set of 7 cards (see evaluator.py)"""
+    return evaluate([c.code for c in cards7])
+
+def evaluate5(cards5):
+    """Determines the shape of five cards and returns a tuple of weights"""
+    ranks = sorted([c.value for c in cards5], reverse=True)
+    counts = {v: ranks.count(v) for v in set(ranks)}
+    is_flush = len(set(c.suit for c in cards5)) == 1
+    uniq = sorted(set(ranks), reverse=True)
+    is_straight = len(uniq) == 5 and max(uniq) - min(uniq) == 4
+    if set([14,5,4,3,2]).issubset(set(ranks)):
+        is_straight, top = True, 5
+    else:
+        top = max(uniq)
+    by_count = sorted(counts.items(), key=lambda x: (x[1], x[0]), reverse=True)
+    if is_flush and is_straight:
+        return (8, top)
+    if by_count[0][1] == 4:
+        return (7, by_count[0][0])
+    if by_count[0][1] == 3 and by_count[1][1] == 2:
+        return (6, by_count[0][0], by_count[1][0])
+    if is_flush:
+        return (5, *sorted(ranks, reverse=True))
+    if is_straight:
+        return (4, top)
+    if by_count[0][1] == 3:
+        return (3, by_count[0][0])
+    if by_count[0][1] == 2 and by_count[1][1] == 2:
+        return (2, by_count[0][0], by_count[1][0])
+    if by_count[0][1] == 2:
+        return (1, by_count[0][0])
+    return (0, *sorted(ranks, reverse=True))
+
+def hand_rank_name(rank_tuple):
+    if isinstance(rank_tuple, int):
+        rank_tuple = score_to_tuple(rank_tuple)
+    category = rank_tuple[0]
+    name_map = {
+        8: "Straight Flush",
+        7: "Four of a Kind",
+        6: "Full House",
+        5: "Flush",
+        4: "Straight",
+        3: "Three of a Kind",
+        2: "Two Pair",
+        1: "One Pair",
+        0: "High Card"
+    }
+    main = VALUE_TO_RANK.get(rank_tuple[1], RANKS[0]) if len(rank_tuple) > 1 else RANKS[0]
+    return f"{name_map.get(category, 'Unknown')} ({main}-high)"
+
+
+# Betting, the one set of rules for Game and multiseat.MultiGame. On each
+# street every seat in cfr.street_turns acts once; a raise of amount puts
+# amount in and lifts the bet to call to at least amount, and whatever is
+# left uncalled when the street ends stays in the pot.
+MIN_RAISE, MAX_RAISE = 10, 100
+
+def pay(game, player, amount):
+    """Move amount of player's chips into the pot"""
+    player.chips -= amount; game.pot += amount
+    player.bet += amount; player.total_bet_hand += amount
+
+def bet(game, player, op, amount=0):
+    """Apply "check", "call", "raise" or "fold" for player: (history action code, chips paid), or None if not allowed now
+
+    A call with nothing owed is a check, and a call short of chips puts
+    in all that is left.
+    """
+    need = game.current_bet - player.bet
+    if op == "fold":
+        player.folded = True
+        return history.FOLD, 0
+    if op == "check" or op == "call" and need <= 0:
+        return (history.CHECK, 0) if need <= 0 else None
+    if op == "call":
+        amt = min(need, player.chips)
+        pay(game, player, amt)
+        return history.CALL, amt
+    if op == "raise" and MIN_RAISE <= amount <= MAX_RAISE and amount <= player.chips:
+        pay(game, player, amount)
+        game.current_bet = max(game.current_bet, amount)
+        return history.RAISE, amount
+    return None
+
+
+class Player:
+    def __init__(self, name, is_human=False):
+        self.name = name
+        self.is_human = is_human
+        self.chips = 100
+        self.hand = [] # Hand (2 cards)
+        self.folded = False
+        self.bet = 0
+        self.total_bet_hand = 0
+        self.strategy = None # None = Game.cpu_action's own logic, else fn(game, player) -> log message
+
+
+class Game:
+    def __init__(self, cpu_budget_ms=CPU_BUDGET_MS, cpu_samples=None, history_sink=None, stats=None, seed=None):
+        # welcome → dice → playing → result, with playing ⇄ raise while the amount is typed
+        self.state = "welcome"
+        # Computer decisions draw from rng and the deck and dice from a child
+        # stream of it, so a seed always replays the same deals and dice, and
+        # the same decisions too when the equity estimates run on a sample
+        # count (cpu_budget_ms=None) rather than a clock
+        self.rng = RngStream(seed)
+        (self.deal_rng,) = self.rng.spawn()
+        self.deck = Deck(self.deal_rng)
+        self.p1 = Player("Player 1", True)
+        self.p2 = Player("Computer", False)
+        self.board = []# Public deck
+        self.revealed = 0
+        self.round = 1
+        self.pot = 0
+        self.current_bet = 0 # Current maximum bet amount
+        self.first_player = 0 # 0=p1 1=p2
+        self.opening = False # The computer is opening the hand, see cpu_action
+        self.winner_msg = "" # Settlement information
+        self.hand_states = [HandState(), HandState()] # Each player's hole cards plus the revealed board
+        self.scores = None # Showdown scores, None after a fold
+        self.rank_names = {} # Card type names, filled on demand
+        self.result_winner = None # Winner name
+        self.result_net_gain = 0
+        self.dice_p1 = 0
+        self.dice_p2 = 0
+        self.dice_ready = False
+        self.dice_animating = False
+        self.dice_timer = 0
+
+        # Every hand as history records, streamed to history_sink.write() when set
+        names = ((self.p1.name, "Player"), (self.p2.name, self.p2.name))
+        self.recorder = history.Recorder(names, history_sink)
+        # Player 1's play as an opponents.StatsStore profile, which the thresholds adapt to
+        self.opponent = None
+        if stats is not None:
+            tracker = stats.tracker(self.p1.name)
+            self.recorder.listener = tracker
+            self.opponent = tracker.profile
+        self.rules_visible = False
+        self.popup_msg = None
+        self.popup_start = 0.0
+        self.raise_text = "" # Digits typed in the raise state
+        self.cpu_budget_ms = cpu_budget_ms
+        self.cpu_samples = cpu_samples
+
+
+    def roll_dice(self):
+        """Dice were rolled to decide who would go first"""
+        self.dice_p1 = self.deal_rng.randint(1,6)
+        self.dice_p2 = self.deal_rng.randint(1,6)
+        if self.dice_p1 == self.dice_p2:
+            return False
+        self.first_player = 0 if self.dice_p1 > self.dice_p2 else 1
+        return True
+
+
+    def new_hand(self):
+        self.deck.reset() # Two cards in each hand
+        self.p1.hand = self.deck.draw(2)
+        self.p2.hand = self.deck.draw(2)
+        # 5 public cards
+        self.board = self.deck.draw(5)
+        # The first round exposes a card directly
+        self.revealed = 1
+        self.round = 1
+        self.pot = 0
+        self.current_bet = 0
+        self.hand_states = [HandState([c.code for c in p.hand + self.board[:1]]) for p in (self.p1, self.p2)]
+        self.scores = None
+        self.rank_names = {}
+        # reset the situation
+        for p in [self.p1, self.p2]:
+            p.folded = False
+            p.bet = 0
+            p.total_bet_hand = 0
+        self.state = "playing"
+        self.recorder.hand(self.first_player, [self.p1.chips, self.p2.chips],
+                           [[c.code for c in p.hand] for p in (self.p1, self.p2)],
+                           [c.code for c in self.board])
+        # If the computer is first, it will automatically perform a round of operation
+        if self.first_player == 1:
+            msg = self.cpu_action(first_turn=True)
+            self.add_log(msg)
+            if self.p2.folded:
+                self.end_game_due_to_fold()
+
+
+    @property
+    def first_turn(self):
+        """Player 1 opens the hand, so there is nothing to call yet"""
+        return self.round == 1 and self.first_player == 0 and self.current_bet == 0
+
+
+    # Player 1 actions, each followed by the computer's reply
+    def player_act(self, op, amount=0):
+        """Apply Player 1's op under the betting rules and let the computer reply; False if not allowed now"""
+        done = bet(self, self.p1, op, amount)
+        if done is None:
+            return False
+        self.recorder.action(0, *done)
+        if self.p1.folded:
+            self.end_game_due_to_fold()
+        else:
+            self.cpu_respond()
+        return True
+
+    def player_check(self):
+        return self.player_act("check")
+
+    def player_raise(self, amt):
+        return self.player_act("raise", amt)
+
+    def player_call(self):
+        # The CALL button does nothing while Player 1 is opening the hand
+        return not self.first_turn and self.player_act("call")
+
+    def player_fold(self):
+        return self.player_act("fold")
+
+    def cpu_respond(self):
+        msg = self.cpu_action()
+        self.add_log(msg)
+        if self.p2.folded:
+            self.end_game_due_to_fold()
+        else:
+            self.next_round()
+
+
+    def add_log(self, msg):
+        """Record an action message returned by cpu_action or a strategy"""
+        self.recorder.message(msg)
+
+    @property
+    def log(self):
+        """The action log text, rendered from the recorder's ring buffer"""
+        return self.recorder.lines()
+
+
+    @profiler.timed()
+    def cpu_action(self, first_turn=False, player=None):
+        """Decide the action from the strategy table, or the strength thresholds without one"""
+        cpu = player or self.p2
+        self.opening = first_turn
+        if cpu.strategy:
+            return cpu.strategy(self, cpu)
+        if cpu.chips < 10:
+            cpu.folded = True
+            return f"{cpu.name} folds (low chips)"
+        if STRATEGY:
+            return self.table_action(cpu, first_turn)
+        return self.threshold_action(cpu)
+
+    def table_action(self, cpu, first_turn=False):
+        """Equity bucket plus a lookup in the CFR strategy table, see cfr.py"""
+        turns = cfr.street_turns(self.revealed, self.first_player)
+        turn = 0 if first_turn else len(turns) - (2 if cpu is self.p1 else 1)
+        hole = [c.code for c in cpu.hand]
+        bucket = cfr.bucket(hole, [c.code for c in self.board[:self.revealed]], PREFLOP)
+        need = self.current_bet - cpu.bet
+        index = cfr.infoset(self.revealed, turn, len(turns), bucket, need, self.pot, cpu.chips)
+        # The table is solved against itself; lean it toward Player 1's profile like the thresholds
+        shift, _ = self.read_opponent(cpu)
+        return self.take(cpu, STRATEGY.choose(index, cfr.legal(need, cpu.chips), self.rng, shift * TABLE_LEAN))
+
+    def take(self, cpu, action):
+        """Apply one of cfr's abstract actions for a computer seat, returning the log message"""
+        if action == cfr.FOLD:
+            return self.act(cpu, "fold")
+        if action == cfr.CALL:
+            return self.act(cpu, "call")
+        return self.act(cpu, "raise", cfr.RAISES[action - 2])
+
+    def act(self, cpu, op, amount=0, code=None):
+        """Apply a computer seat's op under the betting rules, calling instead where it is not allowed; the log message
+
+        code names a raise or call in the log, such as history.BLUFF_RAISE.
+        """
+        done = bet(self, cpu, op, amount)
+        if done is None:
+            done, code = bet(self, cpu, "call"), None
+        kind, paid = done
+        return history.ACTION_TEXT[kind if code is None or kind == history.CHECK else code].format(cpu.name, paid)
+
+    def read_opponent(self, cpu):
+        """(threshold shift, bluff rate) for the thresholds, adapted to Player 1's profile
+
+        A positive shift lowers the bars for raising and calling. Raises
+        mean less from a player who raises a lot, and more from one who
+        raises above their usual size or shows down strong hands; bluffs
+        pay against a player who often folds to a raise. table_action
+        leans the strategy table by the same shift.
+        """
+        p = self.opponent
+        if p is None or cpu is not self.p2:
+            return 0.0, 0.15
+        shift = (p.raise_freq(self.revealed) - opponents.PRIOR_RAISE) * 0.2
+        shift -= (p.showdown_strength - opponents.PRIOR_STRENGTH) * 0.02
+        need = self.current_bet - cpu.bet
+        if need > 0:
+            shift -= (need - p.avg_raise) / p.avg_raise * 0.02
+        bluff = 0.15 * p.fold_to_raise / opponents.PRIOR_FOLD_TO_RAISE
+        return min(max(shift, -0.05), 0.05), min(max(bluff, 0.05), 0.3)
+
+    def threshold_action(self, cpu):
+        """The hand-tuned strategy: thresholds on the equity against a random hand"""
+        # Expected share of the pot against the cards the computer cannot see, 0 to 1
+        hole = [c.code for c in cpu.hand]
+        if self.revealed == 1 and PREFLOP:
+            # First street: table lookup on the hole cards alone
+            strength = PREFLOP.vs_random(preflop.class_of(*hole))
+        else:
+            equity = estimate_equity(hole, [c.code for c in self.board[:self.revealed]],
+                                     budget_ms=self.cpu_budget_ms, max_samples=self.cpu_samples, rng=self.rng)
+            strength = equity.share
+        # The higher the strength, the more inclined to raise or follow, and the weaker may abandon the card
+        r = self.rng.random()
+        shift, bluff = self.read_opponent(cpu)
+
+        # Never discard a strong card
+        if strength >= 0.7 - shift:
+            if r < 0.5:
+                return self.act(cpu, "raise", self.rng.choice([20, 30, 40]))
+            return self.act(cpu, "call")
+
+        elif strength >= 0.5 - shift:
+            if r < 0.75:
+                need = self.current_bet - cpu.bet
+                if need > 0 and cpu.chips >= need:
+                    return self.act(cpu, "call")
+                return self.act(cpu, "raise", self.rng.choice([10, 20]))
+            return self.act(cpu, "fold")
+
+        else:
+            if r < bluff:
+                return self.act(cpu, "raise", 10, history.BLUFF_RAISE)
+            elif r < bluff + 0.45:
+                return self.act(cpu, "call", code=history.CAUTIOUS_CALL)
+            return self.act(cpu, "fold")
+
+
+    def next_round(self):
+        # The betting state is reset after each round
+        self.round += 1
+        self.current_bet = 0
+        self.p1.bet = self.p2.bet = 0
+
+        # If not all the public cards are turned over, a new card is turned over
+        if self.revealed < 5:
+            self.revealed += 1
+            self.recorder.add(history.STREET, x=self.revealed)
+            code = self.board[self.revealed - 1].code
+            for hs in self.hand_states:
+                hs.add(code)
+
+        # If it is round 5 (all cards are turned over), go straight to the showdown
+        if self.round > 5 or self.revealed >= 5:
+            self.end_showdown()
+
+    @profiler.timed()
+    def evaluate_winner(self):
+        """Winner and message at showdown, scored from the per-street hand states"""
+        h1, h2 = self.scores = [hs.score() for hs in self.hand_states]
+        self.recorder.add(history.SCORE, 0, value=h1)
+        self.recorder.add(history.SCORE, 1, value=h2)
+        if h1 > h2:
+            return self.p1, f"{self.p1.name} WINS!"
+        elif h2 > h1:
+            return self.p2, f"{self.p2.name} WINS!"
+        else:
+            return None, "DRAW!"
+
+    def rank_name(self, seat):
+        """Card type of a seat's full hand for the result screen
+
+        After a fold nothing has been scored, so the hand is only
+        completed and named here, the first time somebody asks.
+        """
+        if self.state != "result":
+            return ""
+        if seat not in self.rank_names:
+            if self.scores:
+                score = self.scores[seat]
+            else:
+                hs = self.hand_states[seat]
+                score = hs.score_with([c.code for c in self.board[hs.count - 2:]])
+            self.rank_names[seat] = hand_rank_name(score)
+        return self.rank_names[seat]
+
+    @property
+    def p1_rank(self):
+        return self.rank_name(0)
+
+    @property
+    def p2_rank(self):
+        return self.rank_name(1)
+
+
+    def end_game_due_to_fold(self):
+        # No scores are needed: the other player takes the pot
+        self.revealed = 5
+        self.state = "result"
+        winner = self.p2 if self.p1.folded else self.p1
+        self.result_winner = winner.name
+        self.result_net_gain = self.pot - winner.total_bet_hand
+        winner.chips += self.pot
+        self.winner_msg = f"{winner.name} wins by fold!"
+        self.record_result(winner, True)
+
+
+    def end_showdown(self):
+        self.revealed = 5
+        self.state = "result"
+        winner,msg = self.evaluate_winner()
+        if winner:
+            self.result_winner = winner.name
+            winner_total = winner.total_bet_hand
+            self.result_net_gain = self.pot - winner_total
+            winner.chips += self.pot
+        else:
+            self.result_winner = None
+            self.result_net_gain = 0
+            self.p1.chips += self.pot // 2
+            self.p2.chips += self.pot // 2
+        self.winner_msg = msg
+        self.record_result(winner, False)
+
+    def record_result(self, winner, by_fold):
+        seat = history.NO_SEAT if winner is None else (0 if winner is self.p1 else 1)
+        self.recorder.add(history.RESULT, seat, int(by_fold), value=self.pot)
@@ -0,0 +1,61 @@
+import math
+import random
+import sys
+import time
+from collections import namedtuple
+
+from evaluator import CARD_CODES, HandState
+
+
+FULL_DECK = list(CARD_CODES.values())
+
+
+class Equity(namedtuple("Equity", "win tie samples")):
+    @property
+    def share(self):
+        """Expected fraction of the pot: wins plus half of the ties"""
+        return self.win + self.tie / 2
+
+
+def estimate_equity(hole, board, budget_ms=8, ci=0.03, batch=64, max_samples=None, rng=random):
+    """Monte Carlo heads-up equity of hole cards against a random hand
+
+    hole and board are card codes. Opponent cards and the rest of the
+    board are sampled from the unseen deck until the 95% confidence
+    half-width of the pot share drops below ci, budget_ms runs out or
+    max_samples are drawn. With budget_ms=None the result depends only
+    on rng, which reproducible simulations need.
+    """
+    known = set(hole) | set(board)
+    unseen = [c for c in FULL_DECK if c not in known]
+    need = 7 - len(board)  # two opponent cards plus the missing board cards
+    # The known cards are summed once, each sample only adds what it draws
+    mine, shared = HandState(hole + board), HandState(board)
+    deadline = None if budget_ms is None else time.perf_counter() + budget_ms / 1000
+    sample = rng.sample
+    wins = ties = n = 0
+    while True:
+        for _ in range(batch):
+            drawn = sample(unseen, need)
+            ours = mine.score_with(drawn[2:])
+            theirs = shared.score_with(drawn)
+            if ours > theirs:
+                wins += 1
+            elif ours == theirs:
+                ties += 1
+        n += batch
+        share = (wins + ties / 2) / n
+        # Outcomes are 1, 1/2 or 0, so E[x^2] = (wins + ties/4) / n
+        var = max((wins + ties / 4) / n - share * share, 1e-9)
+        if (1.96 * math.sqrt(var / n) <= ci or (max_samples and n >= max_samples)
+                or (deadline and time.perf_counter() >= deadline)):
+            return Equity(wins / n, ties / n, n)
+
+
+if __name__ == "__main__":
+    # python equity.py A♠ K♠ 10♠ 7♥
+    codes = [CARD_CODES[(c[:-1], c[-1])] for c in sys.argv[1:]]
+    start = time.perf_counter()
+    eq = estimate_equity(codes[:2], codes[2:], budget_ms=1000, ci=0.005)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"win {eq.win:.3f}  tie {eq.tie:.3f}  share {eq.share:.3f}  ({eq.samples} samples, {elapsed:.0f} ms)")
@@ -0,0 +1,253 @@
+import itertools
+import random
+import sys
+import time
+
+
+RANKS = ['2','3','4','5','6','7','8','9','10','J','Q','K','A']
+SUITS = ['♠', '♥', '♦', '♣']
+
+# Card integer layout
+#   bits  0-38  rank counter, three bits per rank (1 << 3*r)
+#   bits 40-55  suit counter, four bits per suit (1 << 40 + 4*s)
+#   bits 56-57  suit index
+#   bits 60-72  rank bit (1 << 60 + r)
+# Summing up to seven cards keeps both counters exact, so one sum()
+# gives the rank multiset and the suit histogram of the whole hand.
+RANK_FIELD = (1 << 39) - 1
+SUIT_SHIFT = 40
+SUIT_INDEX_SHIFT = 56
+RANK_BIT_SHIFT = 60
+
+# Scores pack the old evaluate5 tuple as category << 20 followed by up to
+# five 4-bit rank values, so integer order equals tuple order.
+CATEGORY_SHIFT = 20
+TUPLE_LEN = {8: 1, 7: 1, 6: 2, 5: 5, 4: 1, 3: 1, 2: 2, 1: 1, 0: 5}
+
+
+def encode(r, s):
+    """Pack rank index r (0-12) and suit index s (0-3) into a card int"""
+    return (1 << (RANK_BIT_SHIFT + r)) | (s << SUIT_INDEX_SHIFT) | (1 << (SUIT_SHIFT + 4 * s)) | (1 << (3 * r))
+
+def decode(code):
+    """Inverse of encode: (rank index, suit index)"""
+    return (code >> RANK_BIT_SHIFT).bit_length() - 1, code >> SUIT_INDEX_SHIFT & 3
+
+CARD_CODES = {(rank, suit): encode(r, s) for s, suit in enumerate(SUITS) for r, rank in enumerate(RANKS)}
+
+def card_code(rank, suit):
+    return CARD_CODES[(rank, suit)]
+
+
+def pack(category, *kickers):
+    score = category
+    for k in kickers:
+        score = (score << 4) | k
+    return score << 4 * (5 - len(kickers))
+
+def hand_category(score):
+    """0 = High Card ... 8 = Straight Flush"""
+    return score >> CATEGORY_SHIFT
+
+def score_to_tuple(score):
+    """Unpack a score into the tuple evaluate5 would have returned"""
+    category = score >> CATEGORY_SHIFT
+    kickers = [(score >> (16 - 4 * i)) & 0xF for i in range(TUPLE_LEN[category])]
+    return (category, *kickers)
+
+
+# Lookup tables over 13-bit rank masks
+def _straight_top(mask):
+    runs = mask & mask >> 1 & mask >> 2 & mask >> 3 & mask >> 4
+    if runs:
+        return runs.bit_length() + 5  # lowest bit of the top run, plus four, as a value
+    return 5 if mask & 0x100F == 0x100F else 0
+
+def _top5(mask):
+    ranks = []
+    while mask and len(ranks) < 5:
+        r = mask.bit_length() - 1
+        ranks.append(r + 2)
+        mask ^= 1 << r
+    return ranks
+
+STRAIGHT_TOP = [_straight_top(m) for m in range(8192)]
+FLUSH_TABLE = [0] * 8192
+for _m in range(8192):
+    if _m.bit_count() >= 5:
+        _top = STRAIGHT_TOP[_m]
+        FLUSH_TABLE[_m] = pack(8, _top) if _top else pack(5, *_top5(_m))
+
+
+def _score_counts(counts):
+    """Best non-flush score for a rank multiset given as 13 counts"""
+    mask = 0
+    trips, pairs = [], []
+    for r in range(12, -1, -1):
+        n = counts[r]
+        if n:
+            mask |= 1 << r
+            if n >= 4:
+                return pack(7, r + 2)
+            if n == 3:
+                trips.append(r + 2)
+            elif n == 2:
+                pairs.append(r + 2)
+    if trips and len(trips) + len(pairs) >= 2:
+        return pack(6, trips[0], max(trips[1:] + pairs))
+    top = STRAIGHT_TOP[mask]
+    if top:
+        return pack(4, top)
+    if trips:
+        return pack(3, trips[0])
+    if len(pairs) >= 2:
+        return pack(2, pairs[0], pairs[1])
+    if pairs:
+        return pack(1, pairs[0])
+    return pack(0, *_top5(mask))
+
+def _build_rank_table():
+    table = {}
+    for n in range(1, 8):
+        for combo in itertools.combinations_with_replacement(range(13), n):
+            counts = [0] * 13
+            key = 0
+            for r in combo:
+                counts[r] += 1
+                key += 1 << (3 * r)
+            table[key] = _score_counts(counts)
+    return table
+
+class _RankTable(dict):
+    """Keyed by the summed rank counter of 1 to 7 cards
+
+    The ~75k entries take a few hundred milliseconds to build, so they are
+    filled on the first lookup instead of at import. Counts above four are
+    kept so padded hands with repeated cards still resolve.
+    """
+    def __missing__(self, key):
+        if self:
+            raise KeyError(key)
+        self.update(_build_rank_table())
+        return self[key]
+
+RANK_TABLE = _RankTable()
+
+def prepare_tables():
+    """Build RANK_TABLE now rather than on the first evaluation"""
+    if not RANK_TABLE:
+        RANK_TABLE.update(_build_rank_table())
+
+
+def evaluate(cards):
+    """Score 5 to 7 encoded cards in one pass, larger is stronger"""
+    total = sum(cards)
+    flush = ((total >> SUIT_SHIFT & 0xFFFF) + 0x3333) & 0x8888
+    if flush:
+        # A made flush outranks every non-flush hand that fits in 7 cards
+        s = flush.bit_length() // 4 - 1
+        mask = 0
+        for c in cards:
+            if c >> SUIT_INDEX_SHIFT & 3 == s:
+                mask |= c >> RANK_BIT_SHIFT
+        if FLUSH_TABLE[mask]:
+            return FLUSH_TABLE[mask]
+    return RANK_TABLE[total & RANK_FIELD]
+
+
+class HandState:
+    """A hand that grows one card at a time, scored without revisiting its cards
+
+    total is the summed card codes, i.e. the rank and suit counters, and
+    masks holds the ranks held in each suit for flushes. add() is O(1);
+    score() works from 1 card up, though flushes and straights need 5.
+    """
+    __slots__ = ("total", "masks", "count")
+
+    def __init__(self, cards=()):
+        self.total = 0
+        self.masks = [0, 0, 0, 0]
+        self.count = 0
+        for c in cards:
+            self.add(c)
+
+    def add(self, code):
+        self.total += code
+        self.masks[code >> SUIT_INDEX_SHIFT & 3] |= code >> RANK_BIT_SHIFT
+        self.count += 1
+
+    def copy(self):
+        other = HandState()
+        other.total, other.masks, other.count = self.total, self.masks[:], self.count
+        return other
+
+    def score(self):
+        total = self.total
+        flush = ((total >> SUIT_SHIFT & 0xFFFF) + 0x3333) & 0x8888
+        if flush:
+            mask = self.masks[flush.bit_length() // 4 - 1]
+            if FLUSH_TABLE[mask]:
+                return FLUSH_TABLE[mask]
+        return RANK_TABLE[total & RANK_FIELD]
+
+    def score_with(self, cards):
+        """Score of this hand plus cards, leaving the state as it is"""
+        total = self.total + sum(cards)
+        flush = ((total >> SUIT_SHIFT & 0xFFFF) + 0x3333) & 0x8888
+        if flush:
+            s = flush.bit_length() // 4 - 1
+            mask = self.masks[s]
+            for c in cards:
+                if c >> SUIT_INDEX_SHIFT & 3 == s:
+                    mask |= c >> RANK_BIT_SHIFT
+            if FLUSH_TABLE[mask]:
+                return FLUSH_TABLE[mask]
+        return RANK_TABLE[total & RANK_FIELD]
+
+
+def _check(samples):
+    """Cross-check against engine.evaluate5: every 5-card hand, sampled 6/7-card hands"""
+    from engine import Card, evaluate5
+    deck = [Card(r, s) for s in SUITS for r in RANKS]
+    mismatches = 0
+    checked = 0
+    for combo in itertools.combinations(deck, 5):
+        if score_to_tuple(evaluate([c.code for c in combo])) != evaluate5(list(combo)):
+            mismatches += 1
+            print("mismatch:", " ".join(map(str, combo)))
+        checked += 1
+    for n in (6, 7):
+        for _ in range(samples):
+            hand = random.sample(deck, n)
+            expected = max(evaluate5(list(c)) for c in itertools.combinations(hand, 5))
+            if score_to_tuple(evaluate([c.code for c in hand])) != expected:
+                mismatches += 1
+                print("mismatch:", " ".join(map(str, hand)))
+            checked += 1
+    print(f"checked {checked} hands, {mismatches} mismatches")
+    return mismatches == 0
+
+def _bench(hands):
+    """Time the combinations-based best-of-21 against evaluate on the same 7-card hands"""
+    from engine import Card, evaluate5
+    deck = [Card(r, s) for s in SUITS for r in RANKS]
+    sample = [random.sample(deck, 7) for _ in range(hands)]
+    start = time.perf_counter()
+    for hand in sample:
+        max(evaluate5(list(c)) for c in itertools.combinations(hand, 5))
+    old = time.perf_counter() - start
+    codes = [[c.code for c in hand] for hand in sample]
+    evaluate(codes[0])  # build RANK_TABLE outside the timed loop
+    start = time.perf_counter()
+    for hand in codes:
+        evaluate(hand)
+    new = time.perf_counter() - start
+    print(f"combinations: {hands / old:,.0f} hands/s")
+    print(f"evaluate:     {hands / new:,.0f} hands/s ({old / new:.1f}x)")
+    return old / new
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        sys.exit(0 if _bench(20000) >= 20 else 1)
+    sys.exit(0 if _check(20000) else 1)
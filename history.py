@@ -0,0 +1,333 @@
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+
+from evaluator import decode, encode, evaluate
+
+
+# File layout, little-endian:
+#   header   magic, version, record size
+#   records  fixed 8-byte records appended as hands finish, see RECORD
+MAGIC = b"TDHH"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+# kind, seat, x, y, value
+RECORD = struct.Struct("<BBBBI")
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hand_history.bin")
+
+# Record kinds and what their fields hold
+HAND = 1    # seat: first to act, value: hand number
+STACK = 2   # seat, value: chips before the deal
+DEAL = 3    # seat (BOARD for community cards), x: position, y: card index suit * 13 + rank
+STREET = 4  # x: community cards revealed
+ACTION = 5  # seat, x: action code, value: amount
+SCORE = 6   # seat, value: evaluator score, written at showdown only
+RESULT = 7  # seat: winner or NO_SEAT for a draw, x: 1 if won by fold, value: pot
+
+BOARD = 2
+NO_SEAT = 255
+
+# Action codes index ACTION_TEXT
+CHECK, CALL, RAISE, FOLD, BLUFF_RAISE, CAUTIOUS_CALL, LOW_CHIPS_FOLD = range(7)
+ACTION_TEXT = [
+    "{} checks",
+    "{} calls {}",
+    "{} raises {}",
+    "{} folds",
+    "{} bluff raises {}",
+    "{} cautiously calls {}",
+    "{} folds (low chips)",
+]
+_VERBS = {t[3:].replace(" {}", ""): code for code, t in enumerate(ACTION_TEXT)}
+
+
+def card_index(code):
+    r, s = decode(code)
+    return s * 13 + r
+
+def card_code(index):
+    return encode(index % 13, index // 13)
+
+
+class Recorder:
+    """Encodes one game's hands as records
+
+    Each finished hand goes to sink.write() in one piece, and the latest
+    log-worthy records (hand start, actions, result) stay in a ring buffer
+    that lines() turns back into the action log text. A listener, when
+    set, is called with every record as it is added.
+    """
+    def __init__(self, names, sink=None, size=20):
+        self.names = names  # (full name, name used in action messages) per seat
+        self.sink = sink
+        self.listener = None
+        self.ring = deque(maxlen=size)
+        self.pending = bytearray()
+        self.hands = 0
+
+    def add(self, kind, seat=0, x=0, y=0, value=0):
+        rec = (kind, seat, x, y, value)
+        self.pending += RECORD.pack(*rec)
+        if kind in (HAND, ACTION, RESULT):
+            self.ring.append(rec)
+        if self.listener is not None:
+            self.listener(*rec)
+        if kind == RESULT:
+            if self.sink is not None:
+                self.sink.write(self.pending)
+            self.pending = bytearray()
+
+    def hand(self, first, stacks, holes, board):
+        self.hands += 1
+        self.ring.clear()
+        self.pending = bytearray()
+        self.add(HAND, first, value=self.hands)
+        for seat, chips in enumerate(stacks):
+            self.add(STACK, seat, value=chips)
+        for seat, cards in enumerate(holes + [board]):
+            for pos, code in enumerate(cards):
+                self.add(DEAL, seat, pos, card_index(code))
+
+    def action(self, seat, code, amount=0):
+        self.add(ACTION, seat, code, value=amount)
+
+    def message(self, msg):
+        """Record an action message such as "Computer raises 20" """
+        seat, code, amount = self.parse(msg)
+        self.action(seat, code, amount)
+
+    def parse(self, msg):
+        for seat, names in enumerate(self.names):
+            for name in names:
+                if msg.startswith(name + " "):
+                    verb, _, amount = msg[len(name) + 1:].rpartition(" ")
+                    if not amount.isdigit():
+                        verb, amount = msg[len(name) + 1:], "0"
+                    if verb in _VERBS:
+                        return seat, _VERBS[verb], int(amount)
+        raise ValueError(f"not an action message: {msg!r}")
+
+    def text(self, rec):
+        kind, seat, x, _, value = rec
+        if kind == HAND:
+            return f"{self.names[seat][0]} starts first"
+        if kind == ACTION:
+            return ACTION_TEXT[x].format(self.names[seat][1], value)
+        if seat == NO_SEAT:
+            return "DRAW!"
+        return f"{self.names[seat][0]} wins by fold!" if x else f"{self.names[seat][0]} WINS!"
+
+    def lines(self):
+        return [self.text(rec) for rec in self.ring]
+
+
+class HistoryFile:
+    """Append-only history file, written by a background thread
+
+    write() only appends to a buffer, so the caller never waits on the
+    disk; the thread drains it every flush_interval seconds or as soon
+    as 64 KiB are pending. close() writes whatever is left.
+    """
+    def __init__(self, path=DEFAULT_PATH, flush_interval=1.0):
+        self.f = open(path, "ab")
+        if self.f.tell() == 0:
+            self.f.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        else:
+            with open(path, "rb") as f:
+                _check_header(f.read(HEADER.size), path)
+        self.flush_interval = flush_interval
+        self.pending = bytearray()
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, data):
+        with self.lock:
+            self.pending += data
+            full = len(self.pending) >= 1 << 16
+        if full:
+            self.wake.set()
+
+    def _drain(self):
+        with self.lock:
+            data, self.pending = self.pending, bytearray()
+        if data:
+            self.f.write(data)
+            self.f.flush()
+
+    def _run(self):
+        while not self.closed:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self._drain()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.wake.set()
+        self.thread.join()
+        self._drain()
+        self.f.close()
+
+def open_history(path=DEFAULT_PATH):
+    """HistoryFile at path, or None if it cannot be written"""
+    try:
+        return HistoryFile(path)
+    except (OSError, ValueError):
+        return None
+
+def _check_header(data, path):
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is not a hand history")
+    magic, version, size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} hand history")
+
+
+# Replay
+class HandView:
+    """One recorded hand, decoded straight out of the mapped file"""
+    __slots__ = ("view",)
+
+    def __init__(self, view):
+        self.view = view
+
+    def records(self):
+        return RECORD.iter_unpack(self.view)
+
+    @property
+    def number(self):
+        return RECORD.unpack_from(self.view)[4]
+
+    @property
+    def first(self):
+        return self.view[1]
+
+    def stacks(self):
+        return [value for kind, seat, _, _, value in self.records() if kind == STACK]
+
+    def cards(self):
+        """Card codes dealt to each seat, board last"""
+        cards = [[], [], []]
+        for kind, seat, _, index, _ in self.records():
+            if kind == DEAL:
+                cards[seat].append(card_code(index))
+        return cards
+
+    def actions(self):
+        """(seat, action code, amount, community cards revealed) in order"""
+        revealed, out = 1, []
+        for kind, seat, x, _, value in self.records():
+            if kind == STREET:
+                revealed = x
+            elif kind == ACTION:
+                out.append((seat, x, value, revealed))
+        return out
+
+    def scores(self):
+        return {seat: value for kind, seat, _, _, value in self.records() if kind == SCORE}
+
+    def result(self):
+        """(winner seat or NO_SEAT, won by fold, pot), None for a hand cut off mid-write"""
+        kind, seat, x, _, value = RECORD.unpack_from(self.view, len(self.view) - RECORD.size)
+        return (seat, bool(x), value) if kind == RESULT else None
+
+    def lines(self, names=(("Player 1", "Player"), ("Computer", "Computer"))):
+        rec = Recorder(names)
+        return [rec.text(r) for r in self.records() if r[0] in (HAND, ACTION, RESULT)]
+
+
+class HandHistory:
+    """Read-only memory-mapped hand history, indexable by hand"""
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _check_header(self._mm[:HEADER.size], path)
+        # A crash can leave a partial record at the end, ignore it
+        end = HEADER.size + (len(self._mm) - HEADER.size) // RECORD.size * RECORD.size
+        self.records = memoryview(self._mm)[HEADER.size:end]
+        # Every record's kind byte, to find hand boundaries with bytes.find
+        kinds = self._mm[HEADER.size:end:RECORD.size]
+        starts = array("Q")
+        i = kinds.find(HAND)
+        while i >= 0:
+            starts.append(i * RECORD.size)
+            i = kinds.find(HAND, i + 1)
+        starts.append(len(self.records))
+        self.starts = starts
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return HandView(self.records[self.starts[i]:self.starts[i + 1]])
+
+    def __iter__(self):
+        starts, records = self.starts, self.records
+        for i in range(len(starts) - 1):
+            yield HandView(records[starts[i]:starts[i + 1]])
+
+    def close(self):
+        self.records.release()
+        self._mm.close()
+
+
+def summarize(history, check=False):
+    """Per-seat totals over every complete hand, re-scoring showdowns if check"""
+    hands = folds = draws = mismatches = 0
+    wins = [0, 0]
+    actions = [[0] * len(ACTION_TEXT) for _ in range(2)]
+    for hand in history:
+        result = hand.result()
+        if result is None:
+            continue
+        winner, by_fold, _ = result
+        hands += 1
+        folds += by_fold
+        if winner == NO_SEAT:
+            draws += 1
+        else:
+            wins[winner] += 1
+        for seat, code, _, _ in hand.actions():
+            actions[seat][code] += 1
+        if check and not by_fold:
+            p1, p2, board = hand.cards()
+            scores = hand.scores()
+            mismatches += scores.get(0) != evaluate(p1 + board) or scores.get(1) != evaluate(p2 + board)
+    return hands, folds, draws, wins, actions, mismatches
+
+
+if __name__ == "__main__":
+    # python history.py [path] [--check] [--last N]
+    args = sys.argv[1:]
+    check = "--check" in args
+    last = int(args[args.index("--last") + 1]) if "--last" in args else 0
+    paths = [a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or args[i - 1] != "--last")]
+    start = time.perf_counter()
+    history = HandHistory(paths[0] if paths else DEFAULT_PATH)
+    hands, folds, draws, wins, actions, mismatches = summarize(history, check)
+    elapsed = time.perf_counter() - start
+    print(f"{hands:,} hands in {elapsed:.2f}s ({hands / max(elapsed, 1e-9):,.0f} hands/s)")
+    if hands:
+        print(f"  won by fold {folds / hands:.1%}, drawn {draws / hands:.1%}")
+        for seat in (0, 1):
+            counts = ", ".join(f"{ACTION_TEXT[c][3:].split(' {}')[0]} {n}" for c, n in enumerate(actions[seat]) if n)
+            print(f"  seat {seat + 1}: won {wins[seat] / hands:.1%}  {counts}")
+    if check:
+        print(f"  showdown scores re-evaluated, {mismatches} mismatches")
+    for i in range(max(len(history) - last, 0), len(history)):
+        print(f"hand {history[i].number}:")
+        for line in history[i].lines():
+            print("  " + line)
@@ -0,0 +1,240 @@
+import itertools
+import random
+import sys
+import time
+from bisect import bisect_right
+from math import comb
+
+from evaluator import decode, encode
+
+
+# A situation is two hole cards plus the first k board cards (k = 0..5).
+# Relabelling suits does not change anything about it, so it is indexed
+# by suit pattern: for each suit, the ranks it has among the hole cards
+# and among the board cards. Suits are put in a canonical order by their
+# card counts, then by those rank sets, and the index is made of
+#   shape   how many hole and board cards each suit holds, sorted
+#   groups  per run of suits with the same counts, the multiset of their
+#           rank-set indices, in colex order
+# so every index from 0 to size(k) - 1 is one class of situations.
+# (Waugh, "A Fast and Optimal Hand Isomorphism Algorithm", 2013, for two rounds.)
+STREETS = range(6)
+RANKS = 13
+
+BINOM = [[comb(n, k) for k in range(RANKS + 1)] for n in range(RANKS + 1)]
+
+# Colex rank of each 13-bit rank set among sets of its size: a set's rank is
+# the rank of the set without its top card plus C(top, size)
+COLEX = [0] * (1 << RANKS)
+for _m in range(1, 1 << RANKS):
+    _top = _m.bit_length() - 1
+    COLEX[_m] = COLEX[_m ^ 1 << _top] + BINOM[_top][_m.bit_count()]
+del _m, _top
+
+# index() sorts suits as one int each, (hole count, board count) in the bits
+# from 32 up and the suit's configuration below; KEY0 is a suit without hole cards
+KEY0 = [m.bit_count() << 32 | COLEX[m] for m in range(1 << RANKS)]
+LOW32 = (1 << 32) - 1
+SLOT = {encode(r, s): (s, 1 << r) for s in range(4) for r in range(RANKS)}
+
+
+def _configs(hole, board):
+    """Number of distinct rank-set pairs a suit can hold with these card counts"""
+    return comb(RANKS, hole) * comb(RANKS - hole, board)
+
+def _shapes(k):
+    """Every sorted assignment of (hole count, board count) to the four suits"""
+    per_suit = [(h, b) for h in range(2, -1, -1) for b in range(k, -1, -1)]
+    # Drawn from the descending list, each combination is already sorted
+    return sorted((combo for combo in itertools.combinations_with_replacement(per_suit, 4)
+                   if sum(h for h, _ in combo) == 2 and sum(b for _, b in combo) == k), reverse=True)
+
+def _groups(shape):
+    """[(counts, number of suits)] for runs of equal counts in a sorted shape"""
+    return [(counts, len(list(run))) for counts, run in itertools.groupby(shape)]
+
+def _group_size(counts, n):
+    # Multisets of n configurations
+    return comb(_configs(*counts) + n - 1, n)
+
+class _Street:
+    __slots__ = ("shapes", "offsets", "layout", "codes", "size")
+
+    def __init__(self, k):
+        self.shapes = _shapes(k)
+        self.offsets, total = [], 0
+        self.layout = {}  # shape -> (offset, [(suits in group, group size)])
+        self.codes = {}   # the same, keyed by the shape packed as index() sees it
+        for shape in self.shapes:
+            self.offsets.append(total)
+            groups = [(n, _group_size(counts, n)) for counts, n in _groups(shape)]
+            self.layout[shape] = (total, groups)
+            code = 0
+            for h, b in shape:
+                code = code << 8 | h << 4 | b
+            self.codes[code] = (total, groups)
+            size = 1
+            for _, gs in groups:
+                size *= gs
+            total += size
+        self.size = total
+
+# Built on first use, so importing the module stays cheap
+_STREETS = [None] * len(STREETS)
+
+def _street(k):
+    if _STREETS[k] is None:
+        _STREETS[k] = _Street(k)
+    return _STREETS[k]
+
+
+def size(k):
+    """Number of classes with k board cards: 169, 5 083, 93 769, 1 286 792, 13 960 050, 123 156 254"""
+    return _street(k).size
+
+def _expand(board_mask, hole_mask):
+    """board_mask, indexed among the ranks not in hole_mask, spread back over all 13 ranks"""
+    for r in range(RANKS):
+        if hole_mask >> r & 1:
+            low = (1 << r) - 1
+            board_mask = (board_mask & low) | (board_mask & ~low) << 1
+    return board_mask
+
+
+def index(hole, board):
+    """Class index, 0 to size(len(board)) - 1, of hole and board card codes"""
+    m = [0, 0, 0, 0]  # board ranks per suit
+    for c in board:
+        s, bit = SLOT[c]
+        m[s] |= bit
+    keys = [KEY0[m[0]], KEY0[m[1]], KEY0[m[2]], KEY0[m[3]]]
+    # The hole suits index their hole ranks, then their board ranks among the
+    # ranks left, which is the board mask with the hole ranks squeezed out
+    (s1, h1), (s2, h2) = SLOT[hole[0]], SLOT[hole[1]]
+    if s1 == s2:
+        b = m[s1]
+        nb = b.bit_count()
+        low = max(h1, h2) - 1
+        b = (b & low) | (b >> 1 & ~low)
+        low = min(h1, h2) - 1
+        b = (b & low) | (b >> 1 & ~low)
+        keys[s1] = 2 << 36 | nb << 32 | COLEX[h1 | h2] * BINOM[RANKS - 2][nb] + COLEX[b]
+    else:
+        for s, h in ((s1, h1), (s2, h2)):
+            b = m[s]
+            nb = b.bit_count()
+            low = h - 1
+            keys[s] = 1 << 36 | nb << 32 | COLEX[h] * BINOM[RANKS - 1][nb] + COLEX[(b & low) | (b >> 1 & ~low)]
+    keys.sort(reverse=True)
+    k0, k1, k2, k3 = keys
+    street = _STREETS[len(board)] or _street(len(board))
+    offset, groups = street.codes[(k0 >> 32) << 24 | (k1 >> 32) << 16 | (k2 >> 32) << 8 | k3 >> 32]
+    idx = s = 0
+    for n, gs in groups:
+        if n == 1:
+            group = keys[s] & LOW32
+        else:
+            # Colex index of the multiset: ascending configs, the j-th one shifted up by j
+            group = 0
+            for j in range(n):
+                group += comb((keys[s + n - 1 - j] & LOW32) + j, j + 1)
+        idx = idx * gs + group
+        s += n
+    return offset + idx
+
+
+def _unrank_colex(i, k):
+    """Rank set of size k with colex rank i"""
+    mask = 0
+    for j in range(k, 0, -1):
+        r = j - 1
+        while comb(r + 1, j) <= i:
+            r += 1
+        i -= comb(r, j)
+        mask |= 1 << r
+    return mask
+
+def unindex(k, i):
+    """Canonical (hole, board) card codes of class i with k board cards"""
+    street = _street(k)
+    if not 0 <= i < street.size:
+        raise IndexError(i)
+    shape = street.shapes[bisect_right(street.offsets, i) - 1]
+    rest = i - street.layout[shape][0]
+    groups = _groups(shape)
+    parts = []
+    for counts, n in reversed(groups):
+        gs = _group_size(counts, n)
+        parts.append(rest % gs)
+        rest //= gs
+    parts.reverse()
+    hole, board, suit = [], [], 0
+    for (counts, n), group in zip(groups, parts):
+        configs = []
+        for j in range(n, 0, -1):
+            # Largest x with comb(x + j - 1, j) <= group
+            x = 0
+            while comb(x + j, j) <= group:
+                x += 1
+            group -= comb(x + j - 1, j)
+            configs.append(x)
+        nh, nb = counts
+        for config in configs:  # descending, the same order index() sorts suits in
+            hi, bi = divmod(config, comb(RANKS - nh, nb))
+            h = _unrank_colex(hi, nh)
+            b = _expand(_unrank_colex(bi, nb), h)
+            hole += [encode(r, suit) for r in range(RANKS) if h >> r & 1]
+            board += [encode(r, suit) for r in range(RANKS) if b >> r & 1]
+            suit += 1
+    return hole, board
+
+
+def _relabel(cards, perm):
+    return [encode(r, perm[s]) for r, s in map(decode, cards)]
+
+def check(k, exhaustive=True, samples=200000, rng=random):
+    """Round-trip tests on street k, returning the number of failures"""
+    deck = [encode(r, s) for s in range(4) for r in range(RANKS)]
+    n = size(k)
+    failures = 0
+    # Every class comes back from its representative
+    for i in range(n) if exhaustive else (rng.randrange(n) for _ in range(samples)):
+        hole, board = unindex(k, i)
+        failures += index(hole, board) != i or len(set(hole + board)) != 2 + k
+    # Every situation lands in range, and suit relabellings land on the same class
+    if exhaustive:
+        situations = ((list(h), list(b)) for h in itertools.combinations(deck, 2)
+                      for b in itertools.combinations([c for c in deck if c not in h], k))
+    else:
+        situations = ((d[:2], d[2:]) for d in (rng.sample(deck, 2 + k) for _ in range(samples)))
+    seen = set()
+    perms = list(itertools.permutations(range(4)))
+    for hole, board in situations:
+        i = index(hole, board)
+        perm = rng.choice(perms)
+        failures += not 0 <= i < n or index(_relabel(hole, perm), _relabel(board, perm)) != i
+        seen.add(i)
+    if exhaustive:
+        failures += len(seen) != n
+    return failures
+
+
+if __name__ == "__main__":
+    # python isomorph.py [--check]
+    deck = [encode(r, s) for s in range(4) for r in range(RANKS)]
+    for k in STREETS:
+        hands = [(d[:2], d[2:]) for d in (random.sample(deck, 2 + k) for _ in range(20000))]
+        index(*hands[0])  # lay out the street outside the timing
+        start = time.perf_counter()
+        for hole, board in hands:
+            index(hole, board)
+        per_call = (time.perf_counter() - start) / len(hands) * 1e6
+        raw = comb(52, 2) * comb(50, k)
+        print(f"{k} board cards: {size(k):>12,} classes of {raw:>14,} ({raw / size(k):4.1f}x), index {per_call:.2f} µs")
+    if "--check" in sys.argv:
+        for k in STREETS:
+            exhaustive = k <= 2
+            start = time.perf_counter()
+            failures = check(k, exhaustive)
+            print(f"{k} board cards: {'exhaustive' if exhaustive else 'sampled'} round trip, "
+                  f"{failures} failures ({time.perf_counter() - start:.1f}s)")
@@ -0,0 +1,209 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import time
+
+from server import DEFAULT_PORT, serve
+
+
+def rss_kib(pid):
+    """Resident set size of a process from /proc, None where that is not available"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+def pick(view, rng):
+    """A random action that is legal from this view"""
+    owed, chips = view["owed"], view["chips"][0]
+    raise_to = rng.choice([10, 20, 30, 50, 80])
+    if owed <= 0:
+        choices = [("check", 0)] * 3
+    else:
+        choices = [("call", 0)] * 3 if chips >= owed else []
+        choices.append(("fold", 0))
+    if chips >= raise_to:
+        choices.append(("raise", raise_to))
+    return rng.choice(choices)
+
+
+class Bot:
+    """One loopback client playing hands as fast as the server answers"""
+    def __init__(self, host, port, mode, seed, deadline, stats, think=0.0):
+        self.host, self.port, self.mode = host, port, mode
+        self.think = think
+        self.rng = random.Random(seed)
+        self.deadline = deadline
+        self.stats = stats
+        self.next_id = 0
+        self.view = None
+        self.closed = False
+        self.update = asyncio.Event()
+
+    async def request(self, op, **fields):
+        self.next_id += 1
+        fields.update(id=self.next_id, op=op)
+        start = time.perf_counter()
+        self.writer.write(json.dumps(fields).encode() + b"\n")
+        await self.writer.drain()
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                self.closed = True
+                return False
+            msg = json.loads(line)
+            if "push" not in msg:
+                break
+            self.push(msg)
+        if op not in ("join", "state", "leave"):
+            self.stats["latency"].append(time.perf_counter() - start)
+            self.stats["actions"] += 1
+        if not msg["ok"]:
+            self.stats["errors"] += 1
+        if "view" in msg:
+            self.view = msg["view"]
+        return msg["ok"]
+
+    def push(self, msg):
+        if msg["push"] == "closed":
+            self.closed = True
+        else:
+            self.view = msg["view"]
+        self.update.set()
+
+    async def wait(self):
+        """Read until the other human's move arrives"""
+        line = await self.reader.readline()
+        if not line:
+            self.closed = True
+            return
+        self.push(json.loads(line))
+
+    async def run(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        if not await self.request("join", mode=self.mode):
+            self.writer.close()
+            return
+        self.stats["joined"] += 1
+        while not self.closed and time.perf_counter() < self.deadline:
+            view = self.view
+            seat0 = view["seat"] == 0
+            if view["waiting"] or (not seat0 and not view["your_turn"]):
+                await self.wait()
+            elif view["state"] == "playing":
+                if view["your_turn"]:
+                    if self.think:
+                        await asyncio.sleep(self.rng.expovariate(1 / self.think))
+                    op, amount = pick(view, self.rng)
+                    if not await self.request(op, amount=amount):
+                        await self.request("fold")
+                else:
+                    await self.wait()
+            elif view["state"] == "dice" and view["dice"][0] != view["dice"][1]:
+                await self.request("deal")
+                self.stats["hands"] += 1
+            else:
+                await self.request("roll")
+        if not self.closed:
+            await self.request("leave")
+        self.writer.close()
+
+
+def run_server(host, port, ready):
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    ready.set()
+    asyncio.run(serve(host, port, max_tables=1 << 20))
+
+
+async def load(host, port, tables, mode, seconds, seed, think, barrier):
+    stats = {"latency": [], "actions": 0, "errors": 0, "hands": 0, "joined": 0}
+    clients = tables * (2 if mode == "human" else 1)
+    deadline = time.perf_counter() + 3600
+    bots = [Bot(host, port, mode, seed + i, deadline, stats, think) for i in range(clients)]
+    # Connect in waves so the listen backlog does not overflow
+    tasks = []
+    for i in range(0, clients, 200):
+        tasks += [asyncio.ensure_future(bot.run()) for bot in bots[i:i + 200]]
+        await asyncio.sleep(0.05)
+    while stats["joined"] < clients and not all(t.done() for t in tasks):
+        await asyncio.sleep(0.05)
+    # Every process is seated; the parent reads the server's memory, then the clock starts
+    barrier.wait()
+    barrier.wait()
+    stats["latency"].clear()
+    stats["actions"] = stats["hands"] = stats["errors"] = 0
+    start = time.perf_counter()
+    for bot in bots:
+        bot.deadline = start + seconds
+    await asyncio.gather(*tasks, return_exceptions=True)
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+
+def load_process(args):
+    return asyncio.run(load(*args))
+
+
+def report(results, tables, rss_before, rss_after):
+    stats = {key: sum(r[key] for r in results) for key in ("actions", "errors", "hands", "joined")}
+    elapsed = max(r["elapsed"] for r in results)
+    lat = sorted(x for r in results for x in r["latency"])
+    print(f"{stats['joined']:,} clients at {tables:,} tables in {len(results)} processes, {elapsed:.1f}s")
+    print(f"  {stats['actions']:,} requests ({stats['actions'] / elapsed:,.0f}/s), {stats['hands']:,} hands, {stats['errors']} errors")
+    if lat:
+        pct = lambda q: lat[min(int(q * len(lat)), len(lat) - 1)] * 1000
+        print(f"  latency p50 {pct(0.5):.2f} ms  p90 {pct(0.9):.2f} ms  p99 {pct(0.99):.2f} ms  max {lat[-1] * 1000:.2f} ms")
+    if rss_before is not None and rss_after is not None:
+        print(f"  server memory {rss_after / 1024:.1f} MiB, {(rss_after - rss_before) / max(tables, 1):.1f} KiB per table")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test server.py with loopback bots")
+    parser.add_argument("--tables", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--mode", choices=["cpu", "human"], default="cpu",
+                        help="bots against the computer, or two bots per human table")
+    parser.add_argument("--connect", metavar="HOST:PORT",
+                        help="test a running server instead of starting one")
+    parser.add_argument("--think", type=float, default=0.0, metavar="SECONDS",
+                        help="mean pause before each action; 0 sends the next request as soon as a reply arrives")
+    parser.add_argument("--procs", type=int, default=max((os.cpu_count() or 2) // 2, 1),
+                        help="bot processes; one cannot keep a server busy")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    server = None
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        port = int(port or DEFAULT_PORT)
+    else:
+        # Own process, so the bots do not share its event loop or GIL
+        host, port = "127.0.0.1", DEFAULT_PORT + 1
+        ready = multiprocessing.Event()
+        server = multiprocessing.Process(target=run_server, args=(host, port, ready), daemon=True)
+        server.start()
+        ready.wait()
+        time.sleep(1.0)
+    procs = max(min(args.procs, args.tables), 1)
+    barrier = multiprocessing.Manager().Barrier(procs + 1)
+    jobs = [(host, port, args.tables * (i + 1) // procs - args.tables * i // procs, args.mode, args.seconds,
+             args.seed + 100000 * i, args.think, barrier) for i in range(procs)]
+    rss_before = rss_kib(server.pid) if server else None
+    try:
+        with multiprocessing.Pool(procs) as pool:
+            pending = pool.map_async(load_process, jobs)
+            barrier.wait()
+            rss_after = rss_kib(server.pid) if server else None
+            barrier.wait()
+            report(pending.get(), args.tables, rss_before, rss_after)
+    finally:
+        if server:
+            server.terminate()
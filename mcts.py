@@ -0,0 +1,257 @@
+import math
+import random
+import sys
+import time
+
+from cfr import CALL, FOLD, RAISES, legal, street_turns
+from equity import FULL_DECK
+from evaluator import evaluate
+
+
+LOW_CHIPS = 10      # cpu_action folds below this before looking at its cards
+UCB_C = 1.4         # exploration constant, on payoffs scaled by SCALE
+SCALE = 100         # chips, a starting stack
+ITERATIONS = 300    # per decision where play has to replay, in place of a time budget
+
+
+class State:
+    """One heads-up hand as a small immutable value, played with cfr's abstract actions
+
+    cards is the deal in deck order: Player 1's hole cards, the
+    computer's, then the five board cards. chips, bets and the pot are
+    as in Game, street is the number of board cards showing (5 once the
+    hand is over) and turn indexes cfr.street_turns(street, first).
+    folded is the seat that folded, or -1. apply() returns a new State
+    and shares everything else, so forking a line of play costs one
+    small object.
+    """
+    __slots__ = ("cards", "chips", "bets", "pot", "cur", "street", "turn", "first", "folded")
+
+    def __init__(self, cards, chips, bets=(0, 0), pot=0, cur=0, street=1, turn=0, first=0, folded=-1):
+        self.cards = cards
+        self.chips = chips
+        self.bets = bets
+        self.pot = pot
+        self.cur = cur
+        self.street = street
+        self.turn = turn
+        self.first = first
+        self.folded = folded
+
+    @classmethod
+    def from_game(cls, game, player=None):
+        """The state of game with player (default the computer) to act, as cpu_action sees it"""
+        cpu = player or game.p2
+        turns = street_turns(game.revealed, game.first_player)
+        turn = 0 if game.opening else len(turns) - (2 if cpu is game.p1 else 1)
+        cards = tuple(c.code for c in game.p1.hand + game.p2.hand + game.board)
+        return cls(cards, (game.p1.chips, game.p2.chips), (game.p1.bet, game.p2.bet), game.pot,
+                   game.current_bet, game.revealed, turn, game.first_player)
+
+    def fork(self, **changes):
+        """A copy with some fields replaced"""
+        other = object.__new__(State)
+        for name in State.__slots__:
+            object.__setattr__(other, name, changes.get(name, getattr(self, name)))
+        return other
+
+    @property
+    def done(self):
+        return self.folded >= 0 or self.street > 4
+
+    @property
+    def to_act(self):
+        return street_turns(self.street, self.first)[self.turn]
+
+    def legal(self):
+        """Actions open to the seat to act"""
+        s = self.to_act
+        if self.chips[s] < LOW_CHIPS:
+            return [FOLD]
+        return legal(self.cur - self.bets[s], self.chips[s])
+
+    def apply(self, action):
+        """The state after the seat to act takes action, as Game.take and next_round play it"""
+        street, turn, first = self.street, self.turn, self.first
+        turns = street_turns(street, first)
+        s = turns[turn]
+        if action == FOLD:
+            return State(self.cards, self.chips, self.bets, self.pot, self.cur, street, turn, first, s)
+        c0, c1 = self.chips
+        b0, b1 = self.bets
+        cur = self.cur
+        if action == CALL:
+            pay = min(max(cur - (b1 if s else b0), 0), c1 if s else c0)
+        else:
+            pay = RAISES[action - 2]
+            cur = max(cur, pay)
+        if s:
+            c1 -= pay; b1 += pay
+        else:
+            c0 -= pay; b0 += pay
+        if turn + 1 < len(turns):
+            return State(self.cards, (c0, c1), (b0, b1), self.pot + pay, cur, street, turn + 1, first)
+        # Last to act on the street: turn the next card, or go to the showdown after the fourth street
+        return State(self.cards, (c0, c1), (0, 0), self.pot + pay, 0, street + 1, 0, first)
+
+    def scores(self, cards=None):
+        """Both showdown scores, of cards if given (a redeal) or else the real deal"""
+        c = cards or self.cards
+        board = list(c[4:9])
+        return evaluate(list(c[0:2]) + board), evaluate(list(c[2:4]) + board)
+
+    def payout(self, scores=None):
+        """Both stacks once a finished hand is settled, scores as from scores()"""
+        c0, c1 = self.chips
+        if self.folded >= 0:
+            return (c0, c1 + self.pot) if self.folded == 0 else (c0 + self.pot, c1)
+        s0, s1 = scores or self.scores()
+        if s0 > s1:
+            return c0 + self.pot, c1
+        if s1 > s0:
+            return c0, c1 + self.pot
+        return c0 + self.pot // 2, c1 + self.pot // 2
+
+    def unseen(self, seat):
+        """Cards seat cannot see: all but its own hole cards and the board showing"""
+        c = self.cards
+        known = set(c[2 * seat:2 * seat + 2]) | set(c[4:4 + min(self.street, 5)])
+        return [x for x in FULL_DECK if x not in known]
+
+    def determinize(self, seat, rng=random, unseen=None):
+        """cards with what seat cannot see, the other hole cards and the unturned board, redealt"""
+        c = self.cards
+        shown = min(self.street, 5)
+        drawn = rng.sample(unseen or self.unseen(seat), 7 - shown)
+        mine, theirs = c[2 * seat:2 * seat + 2], tuple(drawn[:2])
+        return (mine + theirs if seat == 0 else theirs + mine) + c[4:4 + shown] + tuple(drawn[2:])
+
+
+class Node:
+    __slots__ = ("state", "children", "untried", "visits", "value")
+
+    def __init__(self, state, rng):
+        self.state = state
+        self.children = {}
+        self.untried = [] if state.done else state.legal()
+        rng.shuffle(self.untried)
+        self.visits = 0
+        self.value = 0.0  # payoff to the seat that chose this node, summed over visits
+
+
+def search(state, budget_ms=8, iterations=None, seed=None):
+    """{action: (visits, total payoff)} at the root after budget_ms, or iterations, of information-set MCTS
+
+    Each iteration redeals the cards the seat to act cannot see, walks
+    the tree by UCB1 (each seat maximising its own payoff), adds one
+    node and plays the rest of the hand out by calling down. Tree nodes
+    are keyed by the actions alone, so their statistics pool over the
+    redeals instead of peeking at any one of them.
+    """
+    rng = random.Random(seed)
+    seat = state.to_act
+    root = Node(state, rng)
+    start = state.chips
+    deadline = None if budget_ms is None else time.perf_counter() + budget_ms / 1000
+    unseen = state.unseen(seat)
+    n = 0
+    while n < iterations if iterations else time.perf_counter() < deadline:
+        n += 1
+        cards = state.determinize(seat, rng, unseen)
+        node, path = root, [root]
+        while not node.untried and node.children:
+            log_n = math.log(node.visits)
+            node = max(node.children.values(),
+                       key=lambda ch: ch.value / ch.visits / SCALE + UCB_C * math.sqrt(log_n / ch.visits))
+            path.append(node)
+        if node.untried:
+            action = node.untried.pop()
+            child = node.children[action] = Node(node.state.apply(action), rng)
+            node, path = child, path + [child]
+        end = node.state
+        while not end.done:
+            moves = end.legal()
+            end = end.apply(CALL if CALL in moves else moves[0])
+        payout = end.payout(None if end.folded >= 0 else end.scores(cards))
+        gain = (payout[0] - start[0], payout[1] - start[1])
+        root.visits += 1
+        for parent, child in zip(path, path[1:]):
+            child.visits += 1
+            child.value += gain[parent.state.to_act]
+    return {a: (ch.visits, ch.value) for a, ch in root.children.items()}
+
+
+def _search(task):
+    return search(*task)
+
+
+class Searcher:
+    """Runs search() in this process, or the same search with different seeds on a pool of workers
+
+    With workers each process grows its own tree for the whole budget
+    (root parallelism) and the visit counts and payoffs are added up,
+    so more cores mean more redeals per decision rather than a longer
+    wait. With iterations set the search stops on that count instead of
+    the clock, which reproducible self-play needs.
+    """
+    def __init__(self, budget_ms=8, workers=None, iterations=None):
+        self.budget_ms = budget_ms
+        self.workers = workers
+        self.iterations = iterations
+        self.pool = None
+
+    def stats(self, state, rng=random):
+        if not self.workers:
+            return search(state, self.budget_ms, self.iterations, rng.getrandbits(64))
+        if self.pool is None:
+            import multiprocessing
+            self.pool = multiprocessing.Pool(self.workers)
+        tasks = [(state, self.budget_ms, self.iterations, rng.getrandbits(64)) for _ in range(self.workers)]
+        total = {}
+        for result in self.pool.map(_search, tasks):
+            for a, (visits, value) in result.items():
+                v, t = total.get(a, (0, 0.0))
+                total[a] = (v + visits, t + value)
+        return total
+
+    def choose(self, state, rng=random):
+        """The most visited root action"""
+        moves = state.legal()
+        if len(moves) == 1:
+            return moves[0]
+        stats = self.stats(state, rng)
+        return max(moves, key=lambda a: stats.get(a, (0, 0.0)))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+    def __call__(self, game, player):
+        """As a Player.strategy: search the game's current spot and take the result"""
+        return game.take(player, self.choose(State.from_game(game, player), game.rng))
+
+
+if __name__ == "__main__":
+    # python mcts.py [budget_ms] [workers]: iterations per decision from a fresh hand
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    rng = random.Random(1)
+    deal = tuple(rng.sample(FULL_DECK, 9))
+    state = State(deal, (100, 100), first=0).apply(CALL)
+    start = time.perf_counter()
+    forks = 100000
+    for _ in range(forks):
+        state.apply(2)
+    print(f"apply: {(time.perf_counter() - start) / forks * 1e6:.2f} µs")
+    searcher = Searcher(budget, workers)
+    searcher.stats(state, rng)  # build the rank table and start the pool outside the timing
+    start = time.perf_counter()
+    stats = searcher.stats(state, rng)
+    elapsed = (time.perf_counter() - start) * 1000
+    visits = sum(v for v, _ in stats.values())
+    names = {FOLD: "fold", CALL: "call", **{2 + i: f"raise {r}" for i, r in enumerate(RAISES)}}
+    print(f"{visits:,} iterations in {elapsed:.1f} ms ({visits / elapsed:,.0f}/ms) with {workers or 1} worker(s)")
+    for a, (v, t) in sorted(stats.items()):
+        print(f"  {names[a]:9} {v:6} visits  {t / v:+7.2f} chips")
+    searcher.close()
@@ -0,0 +1,300 @@
+from collections import deque
+
+from cfr import street_turns
+from engine import CARDS, Deck, Game, Player, bet, hand_rank_name
+from equity import estimate_equity
+from evaluator import HandState
+from streams import RngStream
+import history
+import profiler
+
+
+MIN_SEATS, MAX_SEATS = 2, 9
+CHECK, CALL, RAISE, FOLD = "check", "call", "raise", "fold"
+# History action codes as the ops bet() takes, for replaying recorded duels
+OPS = {history.CHECK: CHECK, history.CALL: CALL, history.RAISE: RAISE, history.FOLD: FOLD,
+       history.BLUFF_RAISE: RAISE, history.CAUTIOUS_CALL: CALL, history.LOW_CHIPS_FOLD: FOLD}
+
+
+class MultiGame:
+    """A table of 2-9 seats, computer or human, with side pots
+
+    The betting is engine.bet(), the duel's rules, with the seats in a
+    list: the first board card shows from the start, on each street
+    every seat still in, all-in or not, acts once in cfr.street_turns
+    order (seat order, with the first player also opening the first
+    street), and the fifth card goes straight to the showdown. The first
+    player moves round the table each hand. With two seats and the same
+    cards and actions a hand plays out as Game's does, except that a
+    showdown with a seat all-in is settled by side_pots() where the duel
+    gives the best hand the whole pot. Computer seats are played by
+    run(); when a human seat is to act, run() returns and waiting holds
+    that seat until act() is called for it.
+    """
+    def __init__(self, names, humans=(), seed=None, cpu_samples=64, chips=100):
+        if not MIN_SEATS <= len(names) <= MAX_SEATS:
+            raise ValueError(f"a table seats {MIN_SEATS} to {MAX_SEATS} players")
+        self.seats = [Player(name, i in humans) for i, name in enumerate(names)]
+        for p in self.seats:
+            p.chips = chips
+        self.rng = RngStream(seed)
+        self.deck = Deck(self.rng)
+        self.cpu_samples = cpu_samples
+        self.first_player = len(self.seats) - 1
+        self.state = "welcome"
+        self.board = []
+        self.revealed = 0
+        self.pot = 0
+        self.current_bet = 0
+        self.pending = []   # seats still to act on this street, in order
+        self.waiting = None  # human seat index to act
+        self.results = []   # (seat index, chips won, hand name) per winner of the last hand
+        self.log = deque(maxlen=20)
+
+    # Hand flow
+    def new_hand(self, first=None, cards=None):
+        """Deal and play up to the first human turn
+
+        first is the seat to open (default: the next one round), and
+        cards replays a deal: each seat's hole cards, then the board.
+        """
+        n = len(self.seats)
+        self.first_player = (self.first_player + 1) % n if first is None else first
+        self.deck.reset()
+        holes = cards[:n] if cards else [self.deck.draw(2) for _ in range(n)]
+        for p, hole in zip(self.seats, holes):
+            p.hand = list(hole)
+            p.bet = p.total_bet_hand = 0
+            p.folded = p.chips <= 0  # busted seats sit the hand out
+        if len(self.live()) < 2:
+            raise ValueError("fewer than two seats have chips")
+        self.board = list(cards[n]) if cards else self.deck.draw(5)
+        self.revealed = 1
+        self.pot = 0
+        self.results = []
+        self.log.clear()
+        self.state = "playing"
+        self.start_street()
+        self.run()
+
+    def order(self):
+        """Seat indices from the first player round the table"""
+        n = len(self.seats)
+        return [(self.first_player + i) % n for i in range(n)]
+
+    def live(self):
+        return [i for i in range(len(self.seats)) if not self.seats[i].folded]
+
+    def start_street(self):
+        self.current_bet = 0
+        for p in self.seats:
+            p.bet = 0
+        self.pending = list(street_turns(self.revealed, self.first_player, len(self.seats)))
+
+    def run(self):
+        """Play computer seats until a human has to act or the hand is over"""
+        while self.state == "playing":
+            if not self.pending:
+                self.end_street()
+                continue
+            i = self.pending[0]
+            seat = self.seats[i]
+            if seat.folded:
+                self.pending.pop(0)
+                continue
+            if seat.is_human:
+                self.waiting = i
+                return
+            op, amount = seat.strategy(self, seat) if seat.strategy else self.cpu_decision(i)
+            if not self.apply(i, op, amount):
+                self.apply(i, CALL)
+        self.waiting = None
+
+    def act(self, op, amount=0):
+        """The waiting human seat acts; False if that action is not allowed now"""
+        if self.waiting is None or not self.apply(self.waiting, op, amount):
+            return False
+        self.waiting = None
+        self.run()
+        return True
+
+    def apply(self, i, op, amount=0):
+        seat = self.seats[i]
+        done = bet(self, seat, op, amount)
+        if done is None:
+            return False
+        kind, paid = done
+        self.log.append(history.ACTION_TEXT[kind].format(seat.name, paid) + (" (all-in)" if paid and not seat.chips else ""))
+        self.pending.pop(0)
+        if len(self.live()) == 1:
+            self.end_by_fold()
+        return True
+
+    def end_street(self):
+        if self.revealed >= 4:
+            self.revealed = 5
+            self.showdown()
+        else:
+            self.revealed += 1
+            self.start_street()
+
+    # Settling
+    def end_by_fold(self):
+        (i,) = self.live()
+        self.seats[i].chips += self.pot
+        self.results = [(i, self.pot, "")]
+        self.log.append(f"{self.seats[i].name} wins {self.pot} by fold")
+        self.finish()
+
+    @profiler.timed()
+    def showdown(self):
+        """Score every live hand once against the shared board, then settle each pot"""
+        board = HandState([c.code for c in self.board])
+        scores = {i: board.score_with([c.code for c in self.seats[i].hand]) for i in self.live()}
+        won = {}
+        order = self.order()
+        for amount, eligible in self.side_pots():
+            best = max(scores[i] for i in eligible)
+            winners = [i for i in order if i in eligible and scores[i] == best]
+            share, odd = divmod(amount, len(winners))
+            for k, i in enumerate(winners):
+                # Odd chips go to the first winners from the first player round
+                won[i] = won.get(i, 0) + share + (k < odd)
+        for i, amount in won.items():
+            self.seats[i].chips += amount
+            self.log.append(f"{self.seats[i].name} wins {amount}" if amount else f"{self.seats[i].name} shows the best hand")
+        self.results = [(i, amount, hand_rank_name(scores[i])) for i, amount in won.items()]
+        self.finish()
+
+    def side_pots(self):
+        """[(chips, eligible seat indices)], main pot first
+
+        Each all-in seat can only win, from every seat, what it put in
+        itself, so each distinct all-in level closes a pot; seats still
+        in with chips behind are eligible for every pot. As in the duel,
+        chips nobody called stay in the pot rather than going back.
+        """
+        live = self.live()
+        levels = sorted({self.seats[i].total_bet_hand for i in live if self.seats[i].chips <= 0})
+        pots, prev = [], 0
+        for level in levels:
+            amount = sum(min(p.total_bet_hand, level) - min(p.total_bet_hand, prev) for p in self.seats)
+            eligible = [i for i in live if self.seats[i].total_bet_hand >= level or self.seats[i].chips > 0]
+            if amount:
+                pots.append((amount, eligible))
+            prev = level
+        rest = sum(max(p.total_bet_hand - prev, 0) for p in self.seats)
+        behind = [i for i in live if self.seats[i].chips > 0]
+        if behind and (rest or not pots):
+            pots.append((rest, behind))  # checked down, an empty pot still has a winner
+        elif rest:
+            pots[-1] = (pots[-1][0] + rest, pots[-1][1])
+        return pots
+
+    def finish(self):
+        self.revealed = 5
+        self.pending = []
+        self.state = "result"
+
+    # Computer seats
+    def cpu_decision(self, i):
+        """Thresholds on the chance of beating every live opponent, against the pot odds"""
+        seat = self.seats[i]
+        need = self.current_bet - seat.bet
+        opponents = len(self.live()) - 1
+        hole = [c.code for c in seat.hand]
+        share = estimate_equity(hole, [c.code for c in self.board[:self.revealed]], budget_ms=None,
+                                max_samples=self.cpu_samples, rng=self.rng).share
+        # Beating each opponent taken as independent; 1 is an even share of the pot
+        strength = share ** opponents * (opponents + 1)
+        r = self.rng.random()
+        if strength >= 1.5 and r < 0.6 and seat.chips > need:
+            # A raise puts in its amount, so it covers what is owed first
+            return RAISE, need + self.rng.choice([10, 20, 30])
+        if need <= 0:
+            return CHECK, 0
+        if strength >= 0.8 or share ** opponents >= need / (self.pot + need):
+            return CALL, 0
+        return FOLD, 0
+
+
+def play_hand(game):
+    """Deal and play one hand to the end with computer seats"""
+    for p in game.seats:
+        if p.chips <= 0:
+            p.chips = 100
+    game.new_hand()
+    return game.results
+
+
+def check_duel(hands=200, seed=1):
+    """Play hands of the duel and replay each on a two-seat MultiGame
+
+    Both seats of the duel are the computer, as in tournament.py. Each
+    hand is replayed from its history records: the same cards, first
+    player and actions, with the stacks the duel started it with.
+    Returns (hands, hands ending with different chips, of those the
+    showdowns MultiGame split between the seats).
+    """
+    import io
+    sink = io.BytesIO()
+    duel = Game(cpu_budget_ms=None, cpu_samples=64, history_sink=sink, seed=seed)
+    table = MultiGame([duel.p1.name, duel.p2.name])
+    script = deque()
+    for p in table.seats:
+        p.strategy = lambda game, seat: script.popleft()
+    differ = split = 0
+    for _ in range(hands):
+        # Same rule as the CONTINUE button
+        if duel.p1.chips < 10 or duel.p2.chips < 10:
+            duel.p1.chips = duel.p2.chips = 100
+        start = len(sink.getvalue())
+        while not duel.roll_dice():
+            pass
+        duel.new_hand()
+        while duel.state == "playing":
+            duel.add_log(duel.cpu_action(player=duel.p1))
+            if duel.p1.folded:
+                duel.end_game_due_to_fold()
+            else:
+                duel.cpu_respond()
+        records = history.HandView(memoryview(sink.getvalue())[start:]).records()
+        cards = [[], [], []]
+        for kind, seat, x, y, value in records:
+            if kind == history.STACK:
+                table.seats[seat].chips = value
+            elif kind == history.DEAL:
+                cards[seat].append(CARDS[y])
+            elif kind == history.ACTION:
+                script.append((OPS[x], value))
+        table.new_hand(first=duel.first_player, cards=cards)
+        if script or [p.chips for p in table.seats] != [duel.p1.chips, duel.p2.chips]:
+            differ += 1
+            # Side pots, or a tie with an odd chip, which the duel drops
+            split += not script and len(table.results) > 1
+        script.clear()
+    return hands, differ, split
+
+
+if __name__ == "__main__":
+    # python multiseat.py [seats] [hands]: self-play and the cost per hand
+    # python multiseat.py --check-duel [hands]: two seats against the duel
+    import sys
+    import time
+    if "--check-duel" in sys.argv:
+        args = [a for a in sys.argv[1:] if a != "--check-duel"]
+        hands, differ, split = check_duel(int(args[0]) if args else 200)
+        print(f"{hands} duel hands replayed on two seats, {differ} with different chips, "
+              f"{split} of them showdowns split by side pots or an odd chip")
+        sys.exit(1 if differ > split else 0)
+    seats = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    hands = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    game = MultiGame([f"Seat {i + 1}" for i in range(seats)], seed=1)
+    start = time.perf_counter()
+    showdowns = 0
+    for _ in range(hands):
+        showdowns += any(name for _, _, name in play_hand(game))
+    elapsed = time.perf_counter() - start
+    print(f"{seats} seats: {hands} hands in {elapsed:.2f}s, {elapsed / hands * 1000:.2f} ms per hand, "
+          f"{showdowns / hands:.0%} to showdown")
+    print("  chips: " + ", ".join(f"{p.name} {p.chips}" for p in game.seats))
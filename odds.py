@@ -0,0 +1,84 @@
+import random
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import isomorph
+import profiler
+from equity import estimate_equity
+
+
+CHUNK = 400             # samples between published refinements
+TARGET = 20000          # samples after which an estimate is final (about ±0.7%)
+PUBLISH_INTERVAL = 0.1  # seconds between on_update calls while refining
+CACHE_SIZE = 256
+
+
+class Odds(namedtuple("Odds", "win tie samples done")):
+    @property
+    def lose(self):
+        return 1 - self.win - self.tie
+
+
+class LiveOdds:
+    """Win/tie/lose odds of the shown cards, computed on a worker thread
+
+    get() never waits: it returns the latest estimate for the cards
+    (None until the first chunk is in) and points the worker at them.
+    The worker refines in chunks of CHUNK samples and drops the cards it
+    was on as soon as they are no longer the ones asked for, so a new
+    street or hand cancels the stale estimate. Estimates are kept per
+    suit-isomorphism class of (hole cards, visible board), finished or
+    not, so going back to cards already seen, or to the same situation in
+    other suits, resumes rather than restarts. on_update is called from
+    the worker, at most every PUBLISH_INTERVAL, so an idle UI loop can
+    wake up and redraw.
+    """
+    def __init__(self, on_update=None, seed=None):
+        self.on_update = on_update
+        self.rng = random.Random(seed)
+        self.cache = OrderedDict()
+        self.key = None
+        self.job = None  # (key, hole, board) for the worker
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def get(self, hole, board):
+        """Latest Odds for hole and board card codes, or None"""
+        key = (len(board), isomorph.index(hole, board))
+        odds = self.cache.get(key)
+        if key != self.key:
+            self.key = key
+            self.job = (key, list(hole), list(board))
+            if odds is None or not odds.done:
+                self.wake.set()
+        return odds
+
+    def _publish(self, key, odds):
+        self.cache[key] = odds
+        self.cache.move_to_end(key)
+        if len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+
+    def _run(self):
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            key, hole, board = self.job
+            odds = self.cache.get(key) or Odds(0.0, 0.0, 0, False)
+            wins, ties, n = odds.win * odds.samples, odds.tie * odds.samples, odds.samples
+            published = 0.0
+            while n < TARGET and self.key == key:
+                with profiler.span("odds"):
+                    eq = estimate_equity(hole, board, budget_ms=None, ci=0, max_samples=CHUNK, rng=self.rng)
+                wins += eq.win * eq.samples
+                ties += eq.tie * eq.samples
+                n += eq.samples
+                self._publish(key, Odds(wins / n, ties / n, n, n >= TARGET))
+                now = time.perf_counter()
+                if self.on_update and (now - published >= PUBLISH_INTERVAL or n >= TARGET):
+                    published = now
+                    self.on_update()
+                # Hand the GIL back to the render thread between chunks
+                time.sleep(0)
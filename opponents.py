@@ -0,0 +1,191 @@
+import os
+import sqlite3
+import sys
+import threading
+
+import history
+from evaluator import hand_category
+
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opponents.sqlite")
+STREETS = 4  # betting rounds, one per revealed card before the showdown
+
+# Counters kept per profile, one column each in the profiles table
+FIELDS = (
+    "hands",
+    "actions_1", "actions_2", "actions_3", "actions_4",
+    "raises_1", "raises_2", "raises_3", "raises_4",
+    "faced_raise", "folded_to_raise",
+    "raise_total",
+    "showdowns", "strength_total",
+)
+
+# What a player with no history is assumed to do, and how many
+# observations that assumption is worth
+PRIOR_RAISE = 0.25
+PRIOR_FOLD_TO_RAISE = 0.4
+PRIOR_RAISE_SIZE = 20
+PRIOR_STRENGTH = 1.5    # hand category at showdown, between one pair and two pairs
+PRIOR_WEIGHT = 10
+
+
+class Profile:
+    """Running counts of one player's play; the aggregates are ratios of them"""
+    __slots__ = ("name",) + FIELDS
+
+    def __init__(self, name, values=None):
+        self.name = name
+        for field, value in zip(FIELDS, values or [0] * len(FIELDS)):
+            setattr(self, field, value)
+
+    def row(self):
+        return (self.name,) + tuple(getattr(self, f) for f in FIELDS)
+
+    def raise_freq(self, street):
+        street = min(max(street, 1), STREETS)
+        raises, actions = getattr(self, f"raises_{street}"), getattr(self, f"actions_{street}")
+        return (raises + PRIOR_RAISE * PRIOR_WEIGHT) / (actions + PRIOR_WEIGHT)
+
+    @property
+    def fold_to_raise(self):
+        return (self.folded_to_raise + PRIOR_FOLD_TO_RAISE * PRIOR_WEIGHT) / (self.faced_raise + PRIOR_WEIGHT)
+
+    @property
+    def avg_raise(self):
+        raises = sum(getattr(self, f"raises_{s}") for s in range(1, STREETS + 1))
+        return (self.raise_total + PRIOR_RAISE_SIZE * PRIOR_WEIGHT) / (raises + PRIOR_WEIGHT)
+
+    @property
+    def showdown_strength(self):
+        """Average hand category shown down, 0 = high card ... 8 = straight flush"""
+        return (self.strength_total + PRIOR_STRENGTH * PRIOR_WEIGHT) / (self.showdowns + PRIOR_WEIGHT)
+
+
+class Tracker:
+    """Feeds one seat's history records into its profile, O(1) per record
+
+    Set as a Recorder's listener, it sees every record the game writes:
+    streets move the betting round on, the other seat's raises open a
+    "facing a raise" spot that this seat's next action closes, and the
+    SCORE record at a showdown gives the hand it turned over.
+    """
+    def __init__(self, store, profile, seat=0):
+        self.store = store
+        self.profile = profile
+        self.seat = seat
+        self.street = 1
+        self.facing = False
+
+    def __call__(self, kind, seat, x, y, value):
+        p = self.profile
+        if kind == history.HAND:
+            self.street, self.facing = 1, False
+            p.hands += 1
+        elif kind == history.STREET:
+            self.street, self.facing = min(x, STREETS), False
+        elif kind == history.ACTION:
+            if seat != self.seat:
+                self.facing = x in (history.RAISE, history.BLUFF_RAISE)
+                return
+            street = self.street
+            setattr(p, f"actions_{street}", getattr(p, f"actions_{street}") + 1)
+            if x in (history.RAISE, history.BLUFF_RAISE):
+                setattr(p, f"raises_{street}", getattr(p, f"raises_{street}") + 1)
+                p.raise_total += value
+            if self.facing:
+                p.faced_raise += 1
+                p.folded_to_raise += x in (history.FOLD, history.LOW_CHIPS_FOLD)
+                self.facing = False
+        elif kind == history.SCORE and seat == self.seat:
+            p.showdowns += 1
+            p.strength_total += hand_category(value)
+        else:
+            return
+        self.store.touch(p)
+
+
+class StatsStore:
+    """Opponent profiles kept in memory and saved to SQLite by a background thread
+
+    Profiles are loaded once when the store opens; after that the game
+    only reads and bumps counters in memory. touch() marks a profile
+    dirty, and every flush_interval seconds the thread writes the dirty
+    ones in a single transaction. close() writes whatever is left.
+    """
+    def __init__(self, path=DEFAULT_PATH, flush_interval=2.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.profiles = {}
+        self.dirty = set()
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.closed = False
+        db = sqlite3.connect(path)
+        try:
+            db.execute(f"CREATE TABLE IF NOT EXISTS profiles (name TEXT PRIMARY KEY, "
+                       f"{', '.join(f + ' INTEGER NOT NULL DEFAULT 0' for f in FIELDS)})")
+            for name, *values in db.execute(f"SELECT name, {', '.join(FIELDS)} FROM profiles"):
+                self.profiles[name] = Profile(name, values)
+            db.commit()
+        finally:
+            db.close()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def profile(self, name):
+        p = self.profiles.get(name)
+        if p is None:
+            p = self.profiles[name] = Profile(name)
+        return p
+
+    def tracker(self, name, seat=0):
+        return Tracker(self, self.profile(name), seat)
+
+    def touch(self, profile):
+        with self.lock:
+            self.dirty.add(profile)
+
+    def _flush(self, db):
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+            rows = [p.row() for p in dirty]
+        if rows:
+            with db:
+                db.executemany(f"INSERT OR REPLACE INTO profiles (name, {', '.join(FIELDS)}) "
+                               f"VALUES ({', '.join('?' * (len(FIELDS) + 1))})", rows)
+
+    def _run(self):
+        db = sqlite3.connect(self.path)
+        try:
+            while not self.closed:
+                self.wake.wait(self.flush_interval)
+                self._flush(db)
+            self._flush(db)
+        except sqlite3.Error:
+            pass  # The statistics must never take the game down
+        finally:
+            db.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.wake.set()
+        self.thread.join()
+
+def open_stats(path=DEFAULT_PATH):
+    """StatsStore at path, or None if it cannot be opened"""
+    try:
+        return StatsStore(path)
+    except sqlite3.Error:
+        return None
+
+
+if __name__ == "__main__":
+    # python opponents.py [path]
+    store = StatsStore(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH)
+    for p in sorted(store.profiles.values(), key=lambda p: -p.hands):
+        freqs = " ".join(f"{p.raise_freq(s):.0%}" for s in range(1, STREETS + 1))
+        print(f"{p.name}: {p.hands} hands, raises by street {freqs}, folds to a raise {p.fold_to_raise:.0%}, "
+              f"average raise {p.avg_raise:.1f}, shows down category {p.showdown_strength:.2f}")
+    store.close()
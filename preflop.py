@@ -0,0 +1,157 @@
+import itertools
+import mmap
+import os
+import struct
+import sys
+import time
+
+from evaluator import RANKS, decode
+
+
+# File layout, little-endian:
+#   header   magic, version, class count, boards sampled per layout (0 = exhaustive)
+#   matrix   169 x 169 uint16, pot share of row class against column class
+#   vs_any   169 uint16, pot share of each class against a random hand
+MAGIC = b"TDPF"
+VERSION = 1
+CLASSES = 169
+HEADER = struct.Struct("<4sHHI4x")
+SCALE = 65535
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "preflop_equity.bin")
+
+
+def hand_class(r1, r2, suited):
+    """Index 0-168: pairs on the diagonal, suited above it, offsuit below it"""
+    hi, lo = max(r1, r2), min(r1, r2)
+    return hi * 13 + lo if suited or hi == lo else lo * 13 + hi
+
+def class_of(c1, c2):
+    """Class of two card codes"""
+    (r1, s1), (r2, s2) = decode(c1), decode(c2)
+    return hand_class(r1, r2, s1 == s2)
+
+def class_name(k):
+    """Short label such as AKs, T9o or 77"""
+    a, b = divmod(k, 13)
+    hi, lo = ("T" if RANKS[r] == "10" else RANKS[r] for r in (max(a, b), min(a, b)))
+    return hi + lo + ("" if a == b else "s" if a > b else "o")
+
+def class_combos(k):
+    """Card index pairs (suit * 13 + rank) making up class k"""
+    a, b = divmod(k, 13)
+    hi, lo = max(a, b), min(a, b)
+    if a == b:
+        return [(s1 * 13 + a, s2 * 13 + a) for s1, s2 in itertools.combinations(range(4), 2)]
+    if a > b:
+        return [(s * 13 + hi, s * 13 + lo) for s in range(4)]
+    return [(s1 * 13 + hi, s2 * 13 + lo) for s1 in range(4) for s2 in range(4) if s1 != s2]
+
+
+class PreflopTable:
+    """Read-only memory-mapped view of a table written by build()"""
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("preflop tables are stored little-endian")
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, classes, self.samples = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION or classes != CLASSES:
+            raise ValueError(f"{path} is not a version {VERSION} preflop table")
+        self._cells = memoryview(self._mm)[HEADER.size:].cast("H")
+
+    def equity(self, a, b):
+        """Pot share of class a against class b"""
+        return self._cells[a * CLASSES + b] / SCALE
+
+    def vs_random(self, a):
+        """Pot share of class a against a random hand"""
+        return self._cells[CLASSES * CLASSES + a] / SCALE
+
+def load(path=DEFAULT_PATH):
+    """Map the table at path, or None if it is missing or from another version"""
+    try:
+        return PreflopTable(path)
+    except (OSError, ValueError):
+        return None
+
+
+# Generator
+def _layouts(a, b):
+    """Non-conflicting card layouts of a matchup up to suit relabelling, with their counts"""
+    layouts = {}
+    for hero in class_combos(a):
+        for villain in class_combos(b):
+            cards = hero + villain
+            if len(set(cards)) < 4:
+                continue
+            suits = {}
+            key = tuple(suits.setdefault(c // 13, len(suits)) * 13 + c % 13 for c in cards)
+            layouts[key] = layouts.get(key, 0) + 1
+    return layouts
+
+_ALL_BOARDS = None
+
+def _cell(task):
+    """Pot share of class a against class b, plus the number of combo pairs it covers"""
+    import numpy as np
+    from batch_eval import evaluate_batch
+    global _ALL_BOARDS
+    a, b, samples, seed = task
+    layouts = _layouts(a, b)
+    weight = sum(layouts.values())
+    if a == b:
+        return a, b, 0.5, weight
+    rng = np.random.default_rng([seed, a, b])
+    if not samples and _ALL_BOARDS is None:
+        flat = itertools.chain.from_iterable(itertools.combinations(range(48), 5))
+        _ALL_BOARDS = np.fromiter(flat, dtype=np.int64).reshape(-1, 5)
+    share = 0.0
+    for cards, count in layouts.items():
+        rest = np.array([c for c in range(52) if c not in cards])
+        if samples:
+            boards = rest[np.argsort(rng.random((samples, 48)), axis=1)[:, :5]]
+        else:
+            boards = rest[_ALL_BOARDS]
+        points = 0.0
+        for start in range(0, len(boards), 1 << 18):
+            chunk = boards[start:start + (1 << 18)]
+            n = len(chunk)
+            hero = evaluate_batch(np.hstack([np.broadcast_to(cards[:2], (n, 2)), chunk]))
+            villain = evaluate_batch(np.hstack([np.broadcast_to(cards[2:], (n, 2)), chunk]))
+            points += (hero > villain).sum() + (hero == villain).sum() / 2
+        share += count * points / len(boards)
+    return a, b, float(share / weight), weight
+
+
+def build(path, samples=0, workers=None, seed=0):
+    """Compute every matchup in a process pool and write the table to path"""
+    import multiprocessing
+    tasks = [(a, b, samples, seed) for a in range(CLASSES) for b in range(a, CLASSES)]
+    matrix = [[0.0] * CLASSES for _ in range(CLASSES)]
+    weights = [[0] * CLASSES for _ in range(CLASSES)]
+    start = time.time()
+    with multiprocessing.Pool(workers) as pool:
+        for done, (a, b, share, weight) in enumerate(pool.imap_unordered(_cell, tasks), 1):
+            matrix[a][b], matrix[b][a] = share, 1 - share
+            weights[a][b] = weights[b][a] = weight
+            if done % 500 == 0 or done == len(tasks):
+                print(f"{done}/{len(tasks)} matchups, {time.time() - start:.0f}s", flush=True)
+    vs_any = [sum(e * w for e, w in zip(matrix[a], weights[a])) / sum(weights[a]) for a in range(CLASSES)]
+    cells = [round(e * SCALE) for row in matrix for e in row] + [round(e * SCALE) for e in vs_any]
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, CLASSES, samples))
+        f.write(struct.pack(f"<{len(cells)}H", *cells))
+    os.replace(tmp, path)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the heads-up preflop equity table")
+    parser.add_argument("-o", "--output", default=DEFAULT_PATH)
+    parser.add_argument("--samples", type=int, default=0,
+                        help="random boards per card layout instead of all 1,712,304")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    build(args.output, args.samples, args.workers, args.seed)
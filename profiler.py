@@ -0,0 +1,135 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+
+# Off by default: timed() functions then cost one flag check and span() a
+# shared null context. enable() switches recording on for the whole process.
+enabled = False
+WINDOW = 300            # latest samples per phase behind the percentiles
+TRACE_LIMIT = 100000    # pending trace events kept between exports
+
+_origin = time.perf_counter()
+_samples = {}
+_trace = deque(maxlen=TRACE_LIMIT)
+_NULL = nullcontext()
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+def record(name, start, end):
+    window = _samples.get(name)
+    if window is None:
+        window = _samples[name] = deque(maxlen=WINDOW)
+    window.append(end - start)
+    _trace.append((name, start, end, threading.get_ident()))
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        record(self.name, self.start, time.perf_counter())
+
+def span(name):
+    """with span("events"): ... times the block while profiling is enabled"""
+    return _Span(name) if enabled else _NULL
+
+def timed(name=None):
+    """Decorator timing every call of the function while profiling is enabled"""
+    def wrap(fn):
+        label = name or fn.__name__
+        @functools.wraps(fn)
+        def timed_fn(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(label, start, time.perf_counter())
+        return timed_fn
+    return wrap
+
+
+def _percentile(ordered, q):
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def stats():
+    """name -> {count, p50_ms, p99_ms, max_ms} over each phase's rolling window"""
+    out = {}
+    for name, window in list(_samples.items()):
+        ordered = sorted(window)
+        if ordered:
+            out[name] = {
+                "count": len(ordered),
+                "p50_ms": _percentile(ordered, 0.5) * 1000,
+                "p99_ms": _percentile(ordered, 0.99) * 1000,
+                "max_ms": ordered[-1] * 1000,
+            }
+    return out
+
+
+class Exporter:
+    """Periodically writes what the spans recorded, for profiling sessions in the field
+
+    prefix.trace.json is a Chrome trace (chrome://tracing, Perfetto) in the
+    JSON array format, appended to at each export; the viewers accept the
+    array without its closing bracket, so a killed session still loads.
+    prefix.summary.json is rewritten with stats(). Files are written on a
+    background thread so tick() in the UI loop stays cheap.
+    """
+    def __init__(self, prefix, interval=10.0):
+        self.trace_path = prefix + ".trace.json"
+        self.summary_path = prefix + ".summary.json"
+        self.interval = interval
+        self.last = time.perf_counter()
+        self.pid = os.getpid()
+        self.writer = None
+        with open(self.trace_path, "w") as f:
+            f.write("[\n")
+
+    def tick(self):
+        now = time.perf_counter()
+        if now - self.last >= self.interval:
+            self.export()
+
+    def export(self, wait=False):
+        self.last = time.perf_counter()
+        events = [_trace.popleft() for _ in range(len(_trace))]
+        summary = stats()
+        if self.writer:
+            self.writer.join()
+        self.writer = threading.Thread(target=self._write, args=(events, summary))
+        self.writer.start()
+        if wait:
+            self.writer.join()
+
+    def _write(self, events, summary):
+        lines = [json.dumps({"name": name, "ph": "X", "pid": self.pid, "tid": tid,
+                             "ts": round((start - _origin) * 1e6, 1),
+                             "dur": round((end - start) * 1e6, 1)}) + ",\n"
+                 for name, start, end, tid in events]
+        try:
+            with open(self.trace_path, "a") as f:
+                f.writelines(lines)
+            tmp = self.summary_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "window": WINDOW, "phases": summary}, f, indent=1)
+            os.replace(tmp, self.summary_path)
+        except OSError:
+            pass  # Profiling must never take the game down
+
+    def close(self):
+        self.export(wait=True)
@@ -0,0 +1,217 @@
+import itertools
+import math
+import random
+import re
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from equity import Equity
+from evaluator import RANKS, SUITS, HandState, encode
+
+
+# Range notation, comma separated:
+#   77  AKs  AKo  AK      one class (AK is suited and offsuit)
+#   77+  A9s+  K9+        pairs up to AA, or the second card up to one below the first
+#   99-66  A5s-A2s        a run of pairs, or of second cards under the same first card
+#   A♠K♠  AsKs  10h9h     one exact combo (suits ♠♥♦♣ or s h d c)
+#   any                   all 1326 combos
+# Any entry can end in :weight, e.g. AKo:0.5; later entries override earlier ones.
+RANK_INDEX = {r: i for i, r in enumerate(RANKS)}
+RANK_INDEX["T"] = RANK_INDEX["10"]
+SUIT_INDEX = {s: i for i, s in enumerate(SUITS)}
+SUIT_INDEX.update(s=0, h=1, d=2, c=3)
+
+CARD = re.compile(r"(?:10|[2-9TJQKA])[♠♥♦♣shdc]", re.I)
+EXACT = re.compile(rf"(?:{CARD.pattern}){{2}}$", re.I)
+
+MAX_BOARDS = 20000      # runouts up to which equity is enumerated exactly
+SAMPLES = 2000          # runouts sampled otherwise
+CACHE_SIZE = 2048       # boards whose combo scores are kept
+
+
+def parse_card(text):
+    """A♠, As or 10♠ as a card code"""
+    return encode(RANK_INDEX[text[:-1].upper()], SUIT_INDEX[text[-1].lower()])
+
+def _class_combos(hi, lo, suited):
+    """Card code pairs of one class; suited is True, False or None for both"""
+    if hi == lo:
+        return [(encode(hi, s1), encode(hi, s2)) for s1, s2 in itertools.combinations(range(4), 2)]
+    return [(encode(hi, s1), encode(lo, s2)) for s1 in range(4) for s2 in range(4)
+            if suited is None or (s1 == s2) == suited]
+
+def _parse_class(text):
+    """(high rank, low rank, suited) of AKs, AKo, AK or 77"""
+    suited = {"s": True, "o": False}.get(text[-1].lower())
+    body = text[:-1] if suited is not None else text
+    n = 2 if body[0:2] == "10" else 1
+    a, b = RANK_INDEX[body[:n].upper()], RANK_INDEX[body[n:].upper()]
+    return max(a, b), min(a, b), suited
+
+def _expand(token):
+    if token.lower() in ("any", "random"):
+        return list(itertools.combinations(sorted(encode(r, s) for s in range(4) for r in range(13)), 2))
+    if EXACT.match(token):
+        return [tuple(parse_card(m.group()) for m in CARD.finditer(token))]
+    if "-" in token:
+        first, last = (_parse_class(t) for t in token.split("-"))
+        if first[0] == first[1] and last[0] == last[1]:
+            classes = [(r, r, None) for r in range(min(first[0], last[0]), max(first[0], last[0]) + 1)]
+        elif first[0] == last[0] and first[2] == last[2]:
+            lo, hi = sorted((first[1], last[1]))
+            classes = [(first[0], r, first[2]) for r in range(lo, hi + 1)]
+        else:
+            raise ValueError(f"bad range {token!r}")
+    elif token.endswith("+"):
+        hi, lo, suited = _parse_class(token[:-1])
+        if hi == lo:
+            classes = [(r, r, None) for r in range(hi, 13)]
+        else:
+            classes = [(hi, r, suited) for r in range(lo, hi)]
+    else:
+        classes = [_parse_class(token)]
+    return [c for hi, lo, suited in classes for c in _class_combos(hi, lo, suited)]
+
+def parse_range(text):
+    """{(card code, card code): weight} for a range such as "22+, AJs+, KQo:0.5" """
+    combos = {}
+    for token in text.replace(" ", "").split(","):
+        if not token:
+            continue
+        token, _, weight = token.partition(":")
+        try:
+            w = float(weight) if weight else 1.0
+            for a, b in _expand(token):
+                if a != b:
+                    combos[(min(a, b), max(a, b))] = w
+        except (KeyError, IndexError, ValueError):
+            raise ValueError(f"bad range entry {token!r}") from None
+    return {c: w for c, w in combos.items() if w > 0}
+
+
+class BoardCache:
+    """LRU of combo scores per complete board, shared by both ranges and across calls"""
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.boards = OrderedDict()
+        self.hits = self.misses = 0
+
+    def scores(self, board, combos):
+        """{combo: score} for the board (a sorted tuple), scoring only combos not seen before"""
+        known = self.boards.get(board)
+        if known is None:
+            known = self.boards[board] = {}
+            if len(self.boards) > self.size:
+                self.boards.popitem(last=False)
+        else:
+            self.boards.move_to_end(board)
+        missing = [c for c in combos if c not in known]
+        self.hits += len(combos) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            score_with = HandState(board).score_with
+            for c in missing:
+                known[c] = score_with(c)
+        return known
+
+BOARD_CACHE = BoardCache()
+
+
+class _Side:
+    """One board's scores of a range, sorted for counting combos below a score"""
+    __slots__ = ("scores", "prefix", "by_card", "weights")
+
+    def __init__(self, combos, scores):
+        ordered = sorted((scores[c], w, c) for c, w in combos)
+        self.scores, self.prefix = self._prefix(ordered)
+        per_card = {}
+        for item in ordered:
+            for card in item[2]:
+                per_card.setdefault(card, []).append(item)
+        self.by_card = {card: self._prefix(items) for card, items in per_card.items()}
+        self.weights = dict(combos)
+
+    @staticmethod
+    def _prefix(ordered):
+        prefix, total = [0.0], 0.0
+        for _, w, _ in ordered:
+            total += w
+            prefix.append(total)
+        return [s for s, _, _ in ordered], prefix
+
+    def against(self, combo, score):
+        """Weight of this side's combos sharing no card with combo: (below score, equal, all)"""
+        below = self.prefix[bisect_left(self.scores, score)]
+        upto = self.prefix[bisect_right(self.scores, score)]
+        total = self.prefix[-1]
+        for card in combo:
+            entry = self.by_card.get(card)
+            if entry:
+                s, p = entry
+                below -= p[bisect_left(s, score)]
+                upto -= p[bisect_right(s, score)]
+                total -= p[-1]
+        # The identical combo was taken away once per card
+        same = self.weights.get(combo, 0.0)
+        return below, upto - below + same, total + same
+
+
+def _accumulate(hero, villain, board, cache, sums):
+    cards = set(board)
+    hero_live = [(c, w) for c, w in hero.items() if c[0] not in cards and c[1] not in cards]
+    villain_live = [(c, w) for c, w in villain.items() if c[0] not in cards and c[1] not in cards]
+    if not hero_live or not villain_live:
+        return
+    scores = cache.scores(board, [c for c, _ in hero_live] + [c for c, _ in villain_live])
+    side = _Side(villain_live, scores)
+    for combo, w in hero_live:
+        below, equal, total = side.against(combo, scores[combo])
+        sums[0] += w * below
+        sums[1] += w * equal
+        sums[2] += w * total
+
+
+def range_equity(hero, villain, board=(), max_boards=MAX_BOARDS, samples=SAMPLES, rng=random, cache=BOARD_CACHE):
+    """Equity of range hero against range villain on a partial board
+
+    Ranges are parse_range() dicts or strings, board card codes. Every
+    runout is enumerated when there are at most max_boards of them,
+    otherwise samples runouts are drawn; either way each runout weighs
+    all non-conflicting combo pairs exactly. Returns an Equity whose
+    samples is the number of runouts evaluated.
+    """
+    hero = parse_range(hero) if isinstance(hero, str) else hero
+    villain = parse_range(villain) if isinstance(villain, str) else villain
+    board = list(board)
+    deck = [c for c in sorted(encode(r, s) for s in range(4) for r in range(13)) if c not in board]
+    missing = 5 - len(board)
+    sums = [0.0, 0.0, 0.0]
+    if math.comb(len(deck), missing) <= max_boards:
+        runouts = itertools.combinations(deck, missing)
+    else:
+        runouts = (rng.sample(deck, missing) for _ in range(samples))
+    n = 0
+    for runout in runouts:
+        _accumulate(hero, villain, tuple(sorted(board + list(runout))), cache, sums)
+        n += 1
+    wins, ties, total = sums
+    if not total:
+        raise ValueError("the ranges have no combos compatible with each other and the board")
+    return Equity(wins / total, ties / total, n)
+
+
+if __name__ == "__main__":
+    # python ranges.py "22+" "TT+, AT+, KT+, QT+, JT" [A♠ 7♥ 2♦]
+    if len(sys.argv) < 3:
+        sys.exit("usage: python ranges.py HERO VILLAIN [board cards]")
+    board = [parse_card(c) for c in sys.argv[3:]]
+    hero, villain = parse_range(sys.argv[1]), parse_range(sys.argv[2])
+    start = time.perf_counter()
+    eq = range_equity(hero, villain, board)
+    elapsed = time.perf_counter() - start
+    exact = math.comb(52 - len(board), 5 - len(board)) <= MAX_BOARDS
+    print(f"{len(hero)} vs {len(villain)} combos, {eq.samples:,} {'runouts (exact)' if exact else 'sampled runouts'} in {elapsed:.2f}s")
+    print(f"win {eq.win:.4f}  tie {eq.tie:.4f}  lose {1 - eq.win - eq.tie:.4f}  share {eq.share:.4f}")
+    print(f"board cache: {BOARD_CACHE.hits:,} hits, {BOARD_CACHE.misses:,} scored")
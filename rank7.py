@@ -0,0 +1,244 @@
+import itertools
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from math import comb
+
+from evaluator import FLUSH_TABLE, RANK_TABLE, encode, evaluate, prepare_tables
+
+
+# File layout, little-endian:
+#   header   magic, version, class count, hand count
+#   classes  class count uint32, the evaluator score of each class, ascending
+#   ranks    C(52, 7) uint16, the class of each hand by its colex index
+# A hand is seven card indices (suit * 13 + rank) c0 < c1 < ... < c6 and its
+# colex index is C(c0, 1) + C(c1, 2) + ... + C(c6, 7), a perfect hash onto
+# 0 .. C(52, 7) - 1. Hands sharing their top card, and within those their
+# second card, make one contiguous run, which is how the build is split.
+MAGIC = b"TDR7"
+VERSION = 1
+CARDS = 7
+HANDS = comb(52, CARDS)  # 133 784 560
+HEADER = struct.Struct("<4sHHI4x")
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rank7.bin")
+
+# BINOM[i][c] = C(c, i + 1), the colex term of the i-th lowest card
+BINOM = [[comb(c, i + 1) for c in range(52)] for i in range(CARDS)]
+_B0, _B1, _B2, _B3, _B4, _B5, _B6 = BINOM
+CODE_INDEX = {encode(i % 13, i // 13): i for i in range(52)}
+
+
+def colex_index(cards):
+    """Index 0 to HANDS - 1 of seven distinct card indices"""
+    c0, c1, c2, c3, c4, c5, c6 = sorted(cards)
+    return _B0[c0] + _B1[c1] + _B2[c2] + _B3[c3] + _B4[c4] + _B5[c5] + _B6[c6]
+
+
+def class_scores():
+    """Every score a 7-card hand can get from evaluate, ascending; a hand's class is its position"""
+    prepare_tables()
+    scores = {FLUSH_TABLE[m] for m in range(8192) if 5 <= m.bit_count() <= CARDS}
+    for combo in itertools.combinations_with_replacement(range(13), CARDS):
+        if max(combo.count(r) for r in set(combo)) <= 4:
+            scores.add(RANK_TABLE[sum(1 << 3 * r for r in combo)])
+    return sorted(scores)
+
+
+class RankTable:
+    """Read-only memory-mapped view of a table written by build()
+
+    Opening only maps the file, so it takes the same time whatever the
+    size, and processes that open the same file share its pages through
+    the page cache. Classes compare like the scores they stand for, and
+    scores[class] gives the score back.
+    """
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("rank tables are stored little-endian")
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, classes, hands = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION or hands != HANDS:
+            raise ValueError(f"{path} is not a version {VERSION} 7-card rank table")
+        self.offset = HEADER.size + 4 * classes
+        if len(self._mm) != self.offset + 2 * HANDS:
+            raise ValueError(f"{path} is truncated")
+        self.scores = memoryview(self._mm)[HEADER.size:self.offset].cast("I").tolist()
+        self._ranks = memoryview(self._mm)[self.offset:].cast("H")
+        self._np_ranks = self._np_binom = None
+
+    def rank(self, cards):
+        """Class of seven card indices"""
+        c0, c1, c2, c3, c4, c5, c6 = sorted(cards)
+        return self._ranks[_B0[c0] + _B1[c1] + _B2[c2] + _B3[c3] + _B4[c4] + _B5[c5] + _B6[c6]]
+
+    def rank_codes(self, codes):
+        """Class of seven evaluator card codes"""
+        return self.rank([CODE_INDEX[c] for c in codes])
+
+    def score(self, cards):
+        """evaluate's score of seven card indices"""
+        return self.scores[self.rank(cards)]
+
+    def rank_batch(self, cards):
+        """Classes of an (N, 7) array of card indices, as a uint16 array"""
+        import numpy as np
+        cards = np.sort(np.asarray(cards, dtype=np.int64), axis=1)
+        if cards.ndim != 2 or cards.shape[1] != CARDS:
+            raise ValueError(f"expected an (N, 7) array, got shape {cards.shape}")
+        if self._np_ranks is None:
+            self._np_binom = np.array(BINOM, dtype=np.int64)
+            self._np_ranks = np.frombuffer(self._mm, dtype="<u2", count=HANDS, offset=self.offset)
+        idx = self._np_binom[0][cards[:, 0]]
+        for i in range(1, CARDS):
+            idx += self._np_binom[i][cards[:, i]]
+        return self._np_ranks[idx]
+
+def load(path=DEFAULT_PATH):
+    """Map the table at path, or None if it is missing, unfinished or from another version"""
+    try:
+        return RankTable(path)
+    except (OSError, ValueError):
+        return None
+
+
+# Generator
+_SUBSETS = None  # every 5-subset of range(50) in colex order, per worker
+
+def _colex_subsets(k, n):
+    import numpy as np
+    rows = np.zeros((1, 0), dtype=np.uint8)
+    for j in range(1, k + 1):
+        rows = np.vstack([np.hstack([rows[:comb(top, j - 1)], np.full((comb(top, j - 1), 1), top, dtype=np.uint8)])
+                          for top in range(j - 1, n)])
+    return rows
+
+def _run(task):
+    """Rank every hand whose top two cards are high and second, writing them in place"""
+    import numpy as np
+    from batch_eval import evaluate_batch
+    global _SUBSETS
+    high, second, path, offset, scores = task
+    if _SUBSETS is None:
+        _SUBSETS = _colex_subsets(CARDS - 2, 50)
+    rest = _SUBSETS[:comb(second, CARDS - 2)]
+    scores = np.asarray(scores)
+    out = np.empty(len(rest), dtype="<u2")
+    for start in range(0, len(rest), 1 << 18):
+        chunk = rest[start:start + (1 << 18)]
+        hands = np.hstack([chunk, np.broadcast_to(np.array([second, high], dtype=np.uint8), (len(chunk), 2))])
+        out[start:start + len(chunk)] = np.searchsorted(scores, evaluate_batch(hands))
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        os.pwrite(fd, out.tobytes(), offset + 2 * (comb(high, CARDS) + comb(second, CARDS - 1)))
+        os.fdatasync(fd)
+    finally:
+        os.close(fd)
+    return high, second, len(rest)
+
+
+def build(path=DEFAULT_PATH, workers=None):
+    """Rank all 7-card hands in a process pool and write the table to path
+
+    The work is written straight into path.part and each finished run is
+    noted in path.part.done, so an interrupted build picks up where it
+    stopped. The header goes in last and the file is renamed into place.
+    """
+    import multiprocessing
+    scores = class_scores()
+    offset = HEADER.size + 4 * len(scores)
+    part, done_path = path + ".part", path + ".part.done"
+    done = set()
+    if os.path.exists(part) and os.path.getsize(part) == offset + 2 * HANDS and os.path.exists(done_path):
+        with open(done_path) as f:
+            done = {tuple(map(int, line.split())) for line in f if len(line.split()) == 2}
+        print(f"resuming, {len(done)} runs already written")
+    else:
+        with open(part, "wb") as f:
+            f.truncate(offset + 2 * HANDS)
+        open(done_path, "w").close()
+    tasks = [(high, second, part, offset, scores) for high in range(CARDS - 1, 52) for second in range(CARDS - 2, high)
+             if (high, second) not in done]
+    # Largest runs first so the pool does not end on one long task
+    tasks.sort(key=lambda t: -comb(t[1], CARDS - 2))
+    start = time.time()
+    written = sum(comb(second, CARDS - 2) for _, second in done)
+    with multiprocessing.Pool(workers) as pool, open(done_path, "a") as log:
+        for finished, (high, second, n) in enumerate(pool.imap_unordered(_run, tasks), 1):
+            log.write(f"{high} {second}\n")
+            log.flush()
+            written += n
+            if finished % 50 == 0 or finished == len(tasks):
+                print(f"{written / HANDS:.1%} of {HANDS:,} hands, {time.time() - start:.0f}s", flush=True)
+    with open(part, "r+b") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(scores), HANDS))
+        f.write(struct.pack(f"<{len(scores)}I", *scores))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(part, path)
+    os.remove(done_path)
+
+
+def check(table, samples=20000, rng=random):
+    """Cross-check sampled hands against evaluate5 and evaluate, returning the number of mismatches"""
+    from engine import CARDS as DECK, evaluate5
+    from evaluator import score_to_tuple
+    mismatches = 0
+    for n in range(samples):
+        hand = rng.sample(range(52), CARDS)
+        cards = [DECK[i] for i in hand]
+        score = table.score(hand)
+        expected = evaluate([c.code for c in cards])
+        # evaluate5 over all 21 five-card subsets is the slow reference, so it sees a tenth of them
+        if score != expected or n % 10 == 0 and score_to_tuple(score) != max(
+                evaluate5(list(c)) for c in itertools.combinations(cards, 5)):
+            mismatches += 1
+            print("mismatch:", " ".join(map(str, cards)))
+    return mismatches
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build, check or time the 7-card rank table")
+    parser.add_argument("command", choices=["build", "check", "bench"])
+    parser.add_argument("-o", "--output", default=DEFAULT_PATH, help="table file")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--samples", type=int, default=20000, help="hands for check and bench")
+    args = parser.parse_args()
+    if args.command == "build":
+        build(args.output, args.workers)
+        sys.exit(0)
+    start = time.perf_counter()
+    table = load(args.output)
+    if table is None:
+        sys.exit(f"no finished table at {args.output}, run: python rank7.py build")
+    print(f"mapped {args.output} in {(time.perf_counter() - start) * 1e6:.0f} µs, {len(table.scores)} classes")
+    if args.command == "check":
+        failures = check(table, args.samples)
+        print(f"checked {args.samples} hands, {failures} mismatches")
+        sys.exit(1 if failures else 0)
+    import numpy as np
+    from batch_eval import evaluate_batch
+    hands = [random.sample(range(52), CARDS) for _ in range(args.samples)]
+    codes = [[encode(i % 13, i // 13) for i in hand] for hand in hands]
+    batch = np.array(hands)
+    evaluate(codes[0])      # build RANK_TABLE
+    table.rank_batch(batch)  # fault in the pages these hands touch; a cold page is a disk read
+    timings = [
+        ("evaluate", lambda: [evaluate(hand) for hand in codes]),
+        ("rank", lambda: [table.rank(hand) for hand in hands]),
+        ("evaluate_batch", lambda: evaluate_batch(batch)),
+        ("rank_batch", lambda: table.rank_batch(batch)),
+    ]
+    for k, (name, fn) in enumerate(timings):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if k % 2 == 0:
+            computed = elapsed
+            print(f"{name:15}{args.samples / elapsed:14,.0f} hands/s")
+        else:
+            print(f"{name:15}{args.samples / elapsed:14,.0f} hands/s ({computed / elapsed:.1f}x)")
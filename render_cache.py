@@ -0,0 +1,75 @@
+import pygame
+from collections import OrderedDict
+
+import profiler
+
+
+class SurfaceCache:
+    """LRU cache of pre-rendered surfaces"""
+    def __init__(self, size):
+        self.size = size
+        self.items = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key, make):
+        surf = self.items.get(key)
+        if surf is None:
+            self.misses += 1
+            surf = self.items[key] = make()
+            if len(self.items) > self.size:
+                self.items.popitem(last=False)
+        else:
+            self.hits += 1
+            self.items.move_to_end(key)
+        return surf
+
+
+class DirtyTracker:
+    """Display list of one frame's draws, presented only where it changed
+
+    Draw helpers call add(key, rect, draw), where key covers everything
+    that affects the pixels and draw() does the actual blit. present()
+    compares the keys with the previous frame: an identical frame is not
+    drawn or presented at all, a small change redraws and updates just
+    the changed rects, and anything larger is a full redraw and flip().
+    """
+    def __init__(self, surface, full_ratio=0.3):
+        self.surface = surface
+        w, h = surface.get_size()
+        self.limit = w * h * full_ratio
+        self.keys = []
+        self.draws = []
+        self.last = None
+
+    def add(self, key, rect, draw):
+        self.keys.append((key, tuple(rect)))
+        self.draws.append(draw)
+
+    def invalidate(self):
+        """Force a full redraw next frame, e.g. after something drew behind our back"""
+        self.last = None
+
+    def present(self, full=False):
+        keys, draws = self.keys, self.draws
+        self.keys, self.draws = [], []
+        if keys == self.last and not full:
+            return 0
+        last, self.last = self.last, keys
+        if last is not None and not full:
+            changed = set(keys).symmetric_difference(last)
+            rects = [pygame.Rect(r) for _, r in changed]
+            if changed and sum(r.w * r.h for r in rects) <= self.limit:
+                clip = rects[0].unionall(rects[1:])
+                self.surface.set_clip(clip)
+                for (_, rect), draw in zip(keys, draws):
+                    if clip.colliderect(rect):
+                        draw()
+                self.surface.set_clip(None)
+                with profiler.span("display.update"):
+                    pygame.display.update(rects)
+                return len(rects)
+        for draw in draws:
+            draw()
+        with profiler.span("display.flip"):
+            pygame.display.flip()
+        return -1
@@ -0,0 +1,278 @@
+import argparse
+import os
+import shutil
+import struct
+import sys
+import time
+import zlib
+
+import pygame
+
+import history
+from engine import CARDS, Player, hand_rank_name
+from evaluator import evaluate
+
+
+# Frames are drawn by Texas_Duel.draw_scene on the SDL dummy driver: the
+# same cards, action log and result panel as the window, with no window.
+_ui = None
+
+def ui():
+    """Texas_Duel, imported offscreen on first use"""
+    global _ui
+    if _ui is None:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        # SDL would turn SIGTERM into a quit event, and Pool.terminate() would wait on it forever
+        os.environ["SDL_NO_SIGNAL_HANDLERS"] = "1"
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        import Texas_Duel
+        _ui = Texas_Duel
+    return _ui
+
+
+class ReplayTable:
+    """The fields draw_scene reads, stepped through one recorded hand
+
+    steps() yields after the deal and after every action, street and
+    result record, each time in the state the game was in at that
+    point, so a hand always replays to the same frames.
+    """
+    def __init__(self, hand, names=(("Player 1", "Player"), ("Computer", "Computer"))):
+        self.hand = hand
+        self.recorder = history.Recorder(names)
+        self.p1, self.p2 = Player(names[0][0], True), Player(names[1][0])
+        self.state = "playing"
+        self.board = []
+        self.revealed = 1
+        self.round = 1
+        self.pot = 0
+        self.current_bet = 0
+        self.first_player = hand.first
+        self.log = []
+        self.winner_msg = ""
+        self.result_winner = None
+        self.result_net_gain = 0
+        self.rules_visible = False
+        self.popup_msg = None
+        self.ranks = {}
+
+    @property
+    def first_turn(self):
+        return self.round == 1 and self.first_player == 0 and self.current_bet == 0
+
+    @property
+    def p1_rank(self):
+        return self.ranks.get(0, "")
+
+    @property
+    def p2_rank(self):
+        return self.ranks.get(1, "")
+
+    def steps(self):
+        seats = (self.p1, self.p2)
+        deal = [[], [], []]
+        for rec in self.hand.records():
+            kind, seat, x, y, value = rec
+            if kind == history.STACK:
+                seats[seat].chips = value
+            elif kind == history.DEAL:
+                deal[seat].append(CARDS[y])
+                if len(deal[2]) == 5:
+                    self.p1.hand, self.p2.hand, self.board = deal
+                    self.log.append(self.recorder.text((history.HAND, self.first_player, 0, 0, 0)))
+                    yield
+            elif kind == history.ACTION:
+                p = seats[seat]
+                if x == history.FOLD or x == history.LOW_CHIPS_FOLD:
+                    p.folded = True
+                p.chips -= value
+                p.bet += value
+                p.total_bet_hand += value
+                self.pot += value
+                self.current_bet = max(self.current_bet, p.bet)
+                self.log.append(self.recorder.text(rec))
+                yield
+            elif kind == history.STREET:
+                self.revealed = self.round = x
+                self.current_bet = self.p1.bet = self.p2.bet = 0
+                yield
+            elif kind == history.RESULT:
+                self.settle(seat, value)
+                self.log.append(self.recorder.text(rec))
+                self.winner_msg = self.recorder.text(rec)
+                yield
+
+    def settle(self, seat, pot):
+        self.state = "result"
+        self.revealed = 5
+        if seat == history.NO_SEAT:
+            self.p1.chips += pot // 2
+            self.p2.chips += pot // 2
+        else:
+            winner = (self.p1, self.p2)[seat]
+            winner.chips += pot
+            self.result_winner = winner.name
+            self.result_net_gain = pot - winner.total_bet_hand
+        board = [c.code for c in self.board]
+        for i, p in enumerate((self.p1, self.p2)):
+            self.ranks[i] = hand_rank_name(evaluate([c.code for c in p.hand] + board))
+
+
+# Animated PNG, written with zlib alone: one IHDR, then an fcTL frame
+# control and the image data for each frame (IDAT for the first, fdAT after).
+# fcTL holds a frame's delay as a 16-bit fraction; over 100 it reaches 655.35 s.
+MAX_DELAY_MS = 65535 * 10
+
+def _chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+class APNGWriter:
+    """Frames of one size appended to an animated PNG, each shown for delay_ms"""
+    def __init__(self, path, size, delay_ms=1000):
+        self.path = path
+        self.width, self.height = size
+        self.delay_ms = delay_ms
+        self.frames = []  # (compressed rows, delay in hundredths of a second)
+
+    def add(self, rgb, hold=1):
+        """Append one frame of RGB bytes, shown for hold * delay_ms (at most MAX_DELAY_MS)"""
+        rows = self.width * 3
+        # Filter type 0 in front of every row
+        raw = b"".join(b"\0" + rgb[i:i + rows] for i in range(0, len(rgb), rows))
+        # In hundredths of a second, clamped to what fcTL can hold
+        self.frames.append((zlib.compress(raw, 6), min(round(self.delay_ms * hold / 10), 65535)))
+
+    def close(self):
+        seq = 0
+        out = [b"\x89PNG\r\n\x1a\n",
+               _chunk(b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)),
+               _chunk(b"acTL", struct.pack(">II", len(self.frames), 0))]
+        for i, (data, delay) in enumerate(self.frames):
+            out.append(_chunk(b"fcTL", struct.pack(">IIIIIHHBB", seq, self.width, self.height, 0, 0, delay, 100, 0, 0)))
+            seq += 1
+            if i == 0:
+                out.append(_chunk(b"IDAT", data))
+            else:
+                out.append(_chunk(b"fdAT", struct.pack(">I", seq) + data))
+                seq += 1
+        out.append(_chunk(b"IEND", b""))
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"".join(out))
+        os.replace(tmp, self.path)
+
+
+def output_name(index):
+    """Output name of the hand at index in the history file
+
+    Recorded hand numbers restart with every game, batch and session
+    appended to the same file, so the position in the file is what
+    tells hands apart.
+    """
+    return f"hand_{index:06d}"
+
+
+def render_hand(task):
+    """Render one recorded hand to out_dir, returning (hand index, frames drawn)
+
+    Writes hand_NNNNNN/frame_NNNN.png, each step repeated hold times,
+    or one hand_NNNNNN.png animated PNG with every step held for
+    hold * delay_ms, NNNNNN being the hand's index in the file.
+    """
+    path, index, out_dir, fmt, hold, delay_ms = task
+    game_ui = ui()
+    hand = _history(path)[index]
+    table = ReplayTable(hand)
+    name = os.path.join(out_dir, output_name(index))
+    if fmt == "png":
+        os.makedirs(name, exist_ok=True)
+        writer = None
+    else:
+        writer = APNGWriter(name + ".png", game_ui.screen.get_size(), delay_ms)
+    game_ui.frame.invalidate()
+    frames = 0
+    for _ in table.steps():
+        game_ui.draw_scene(table)
+        game_ui.present()
+        if writer:
+            writer.add(pygame.image.tobytes(game_ui.screen, "RGB"), hold)
+        else:
+            first = os.path.join(name, f"frame_{frames * hold:04d}.png")
+            pygame.image.save(game_ui.screen, first)
+            for k in range(1, hold):
+                shutil.copyfile(first, os.path.join(name, f"frame_{frames * hold + k:04d}.png"))
+        frames += 1
+    if writer:
+        writer.close()
+    return index, frames
+
+_histories = {}
+
+def _history(path):
+    """The mapped history at path, opened once per process"""
+    hands = _histories.get(path)
+    if hands is None:
+        hands = _histories[path] = history.HandHistory(path)
+    return hands
+
+
+def select(hands, last=10, min_pot=0, showdown=False):
+    """Indices of the last hands (0 = all) that finished with at least min_pot, optionally at a showdown"""
+    picked = []
+    for i, hand in enumerate(hands):
+        result = hand.result()
+        if result is None:
+            continue
+        _, by_fold, pot = result
+        if pot >= min_pot and not (showdown and by_fold):
+            picked.append(i)
+    return picked[-last:] if last else picked
+
+
+def export(path, indices, out_dir, fmt="apng", hold=1, delay_ms=1000, workers=None):
+    """Render the hands at indices across a process pool; returns (frames, seconds, processes)"""
+    import multiprocessing
+    names = [output_name(i) for i in indices]
+    if len(set(names)) != len(names):
+        # Workers would overwrite each other's output, and race on its temporary file
+        raise ValueError("two hands would be written to the same output name")
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    tasks = [(path, i, out_dir, fmt, hold, delay_ms) for i in indices]
+    start = time.perf_counter()
+    frames = 0
+    with multiprocessing.Pool(workers) as pool:
+        for _, n in pool.imap_unordered(render_hand, tasks):
+            frames += n
+    return frames, time.perf_counter() - start, min(workers, len(tasks))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render recorded hands offscreen as PNG frames or animated PNGs")
+    parser.add_argument("history", nargs="?", default=history.DEFAULT_PATH, help="hand history file")
+    parser.add_argument("-o", "--out", default="replays", help="output directory")
+    parser.add_argument("--format", choices=["apng", "png"], default="apng",
+                        help="one animated PNG per hand, or a directory of PNG frames per hand")
+    parser.add_argument("--last", type=int, default=10, help="how many of the most recent matching hands, in the order played (0 = all)")
+    parser.add_argument("--min-pot", type=int, default=0, help="only hands with at least this pot")
+    parser.add_argument("--showdown", action="store_true", help="only hands that reached a showdown")
+    parser.add_argument("--hold", type=int, default=1, help="frames per step of the hand")
+    parser.add_argument("--delay-ms", type=int, default=1000, help="animated PNG time per frame")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    args = parser.parse_args()
+    if args.hold < 1:
+        parser.error("--hold must be at least 1")
+    if args.delay_ms < 10:
+        parser.error("--delay-ms must be at least 10, animated PNG delays are in hundredths of a second")
+    if args.delay_ms * args.hold > MAX_DELAY_MS:
+        parser.error(f"--delay-ms times --hold must be at most {MAX_DELAY_MS} ms, the longest animated PNG frame")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    hands = history.HandHistory(args.history)
+    indices = select(hands, args.last, args.min_pot, args.showdown)
+    hands.close()
+    if not indices:
+        sys.exit(f"no matching hands in {args.history}")
+    frames, elapsed, procs = export(args.history, indices, args.out, args.format, args.hold, args.delay_ms, args.workers)
+    print(f"{len(indices)} hands, {frames} frames in {elapsed:.2f}s: "
+          f"{frames / elapsed:.1f} frames/s, {frames / elapsed / procs:.1f} frames/s per core ({procs} processes)")
@@ -0,0 +1,341 @@
+import asyncio
+import itertools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import history
+from engine import CPU_BUDGET_MS, Game, bet
+
+
+# Protocol: one JSON object per line in each direction.
+#   request   {"id": 1, "op": "join", "mode": "cpu" | "human"}
+#             {"id": 2, "op": "roll"}  {"op": "deal"}  {"op": "check"}  {"op": "call"}
+#             {"op": "raise", "amount": 20}  {"op": "fold"}  {"op": "state"}  {"op": "leave"}
+#   response  {"id": 2, "ok": true, "view": {...}} or {"id": 2, "ok": false, "error": "..."}
+#   push      {"push": "update", "view": {...}} when the other human at the table acted
+# Views are from the receiving seat's side: index 0 of chips, bets and dice is always "you".
+DEFAULT_PORT = 7878
+MAX_LINE = 4096             # longest accepted request line
+MAX_BUFFER = 1 << 16        # pending output after which a client is too slow to keep
+IDLE_TIMEOUT = 600          # seconds before an untouched table is closed
+MAX_AMOUNT = 10000          # far above any stack; a larger raise amount is a malformed request
+
+
+class AwaitingSeat(Exception):
+    """Player 2's turn came up and its client has not sent the action yet"""
+
+
+def seat_action(game, player, op, amount=0):
+    """Apply a remote Player 2's action under engine's betting rules, None if not allowed now"""
+    done = bet(game, player, op, amount)
+    if done is None:
+        return None
+    return history.ACTION_TEXT[done[0]].format(player.name, done[1])
+
+
+class RemoteDuel(Game):
+    """Human vs human: Player 2's turns wait for its client instead of running cpu_action
+
+    When the engine asks Player 2 to act, cpu_action raises AwaitingSeat
+    and leaves the game as it was; remote_action() later replays that
+    step with the client's action queued.
+    """
+    def __init__(self):
+        super().__init__()
+        self.p2.name, self.p2.is_human = "Player 2", True
+        self.recorder.names = ((self.p1.name, "Player"), (self.p2.name, self.p2.name))
+        self.awaiting = None  # "open" or "respond" while Player 2 is to act
+        self.queued = None
+
+    def cpu_action(self, first_turn=False, player=None):
+        if player not in (None, self.p2):
+            return super().cpu_action(first_turn, player)
+        if self.queued is None:
+            self.awaiting = "open" if first_turn else "respond"
+            raise AwaitingSeat
+        msg, self.queued, self.awaiting = self.queued, None, None
+        return msg
+
+    def new_hand(self):
+        self.awaiting = None
+        try:
+            super().new_hand()
+        except AwaitingSeat:
+            pass
+
+    def remote_action(self, op, amount=0):
+        step = self.awaiting
+        msg = seat_action(self, self.p2, op, amount)
+        if msg is None:
+            return False
+        self.queued = msg
+        if step == "open":
+            self.add_log(self.cpu_action(first_turn=True))
+            if self.p2.folded:
+                self.end_game_due_to_fold()
+        else:
+            self.cpu_respond()
+        return True
+
+
+class Table:
+    __slots__ = ("id", "game", "mode", "conns", "lock", "touched")
+
+    def __init__(self, table_id, mode, cpu_budget_ms):
+        self.id = table_id
+        self.mode = mode
+        self.game = RemoteDuel() if mode == "human" else Game(cpu_budget_ms=cpu_budget_ms)
+        self.conns = [None, None]
+        self.lock = asyncio.Lock()
+        self.touched = time.monotonic()
+
+    def to_act(self):
+        game = self.game
+        if game.state != "playing":
+            return None
+        return 1 if getattr(game, "awaiting", None) else 0
+
+    def view(self, seat):
+        game = self.game
+        me, other = (game.p1, game.p2) if seat == 0 else (game.p2, game.p1)
+        result = game.state == "result"
+        shown = 5 if result else game.revealed
+        return {
+            "table": self.id,
+            "mode": self.mode,
+            "seat": seat,
+            "waiting": self.mode == "human" and None in self.conns,
+            "hand_no": game.recorder.hands,
+            "state": game.state,
+            "your_turn": self.to_act() == seat,
+            "first_turn": seat == 0 and game.first_turn,
+            "owed": max(game.current_bet - me.bet, 0),
+            "pot": game.pot,
+            "round": game.round,
+            "revealed": game.revealed,
+            "names": [me.name, other.name],
+            "chips": [me.chips, other.chips],
+            "bets": [me.bet, other.bet],
+            "dice": [game.dice_p1, game.dice_p2][::1 if seat == 0 else -1],
+            "first": 0 if game.first_player == seat else 1,
+            "hand": [str(c) for c in me.hand],
+            "opponent": [str(c) for c in other.hand] if result else [],
+            "board": [str(c) for c in game.board[:shown]] if game.state != "welcome" else [],
+            "log": game.log,
+            "winner": game.winner_msg if result else "",
+            "you_won": (game.result_winner == me.name) if result and game.result_winner else None,
+            "net_gain": game.result_net_gain if result else 0,
+            "ranks": [game.rank_name(seat), game.rank_name(1 - seat)] if result else ["", ""],
+        }
+
+
+class Conn:
+    __slots__ = ("writer", "table", "seat")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.table = None
+        self.seat = 0
+
+    def send(self, obj):
+        """Queue a line for the client, dropping the client if it stopped reading"""
+        if self.writer.transport.get_write_buffer_size() > MAX_BUFFER:
+            self.writer.close()
+            return
+        self.writer.write(json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode() + b"\n")
+
+
+class DuelServer:
+    """Hosts many tables in one process
+
+    Tables against the computer run their engine calls (which include
+    the computer's reply) on a worker thread, so the event loop keeps
+    serving other tables while a decision is computed.
+    """
+    def __init__(self, max_tables=20000, cpu_budget_ms=CPU_BUDGET_MS, idle_timeout=IDLE_TIMEOUT):
+        self.max_tables = max_tables
+        self.cpu_budget_ms = cpu_budget_ms
+        self.idle_timeout = idle_timeout
+        self.tables = {}
+        self.waiting = None  # human table with one seat filled
+        self.ids = itertools.count(1)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cpu")
+        self.actions = 0
+
+    async def handle(self, reader, writer):
+        conn = Conn(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    break
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                    reply = await self.dispatch(conn, msg)
+                except (ValueError, TypeError, KeyError, OverflowError) as e:
+                    msg, reply = {}, {"ok": False, "error": f"bad request: {e}"}
+                reply["id"] = msg.get("id") if isinstance(msg, dict) else None
+                conn.send(reply)
+                await writer.drain()
+                if msg.get("op") == "leave":
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.leave(conn)
+            writer.close()
+
+    async def dispatch(self, conn, msg):
+        op = msg["op"]
+        if op == "join":
+            return self.join(conn, msg.get("mode", "cpu"))
+        if op == "leave":
+            return {"ok": True}  # also when the table was already closed
+        table = conn.table
+        if table is None:
+            return {"ok": False, "error": "join a table first"}
+        table.touched = time.monotonic()
+        if op == "state":
+            return {"ok": True, "view": table.view(conn.seat)}
+        async with table.lock:
+            error = await self.apply(table, conn.seat, op, msg)
+        if error:
+            return {"ok": False, "error": error, "view": table.view(conn.seat)}
+        other = table.conns[1 - conn.seat]
+        if other is not None:
+            other.send({"push": "update", "view": table.view(other.seat)})
+        return {"ok": True, "view": table.view(conn.seat)}
+
+    def join(self, conn, mode):
+        if conn.table is not None:
+            return {"ok": False, "error": "already at a table"}
+        if mode not in ("cpu", "human"):
+            return {"ok": False, "error": f"unknown mode {mode!r}"}
+        if mode == "human" and self.waiting is not None:
+            table, self.waiting = self.waiting, None
+            seat = 1
+        elif len(self.tables) >= self.max_tables:
+            return {"ok": False, "error": "server full"}
+        else:
+            table = Table(next(self.ids), mode, self.cpu_budget_ms)
+            self.tables[table.id] = table
+            seat = 0
+            if mode == "human":
+                self.waiting = table
+        table.conns[seat] = conn
+        conn.table, conn.seat = table, seat
+        if seat == 1:
+            table.conns[0].send({"push": "update", "view": table.view(0)})
+        return {"ok": True, "view": table.view(seat)}
+
+    def leave(self, conn):
+        table = conn.table
+        if table is None:
+            return
+        conn.table = None
+        table.conns[conn.seat] = None
+        if self.waiting is table:
+            self.waiting = None
+        other = table.conns[1 - conn.seat]
+        if other is not None:
+            # The duel is over for the other human too
+            other.send({"push": "closed", "reason": "opponent left"})
+            other.table = None
+        self.tables.pop(table.id, None)
+
+    async def apply(self, table, seat, op, msg):
+        """Run one action, returning an error message or None"""
+        game = table.game
+        if op == "roll":
+            if game.state == "playing":
+                return "a hand is in progress"
+            if table.mode == "human" and None in table.conns:
+                return "waiting for an opponent"
+            # Same rule as the CONTINUE button
+            if game.p1.chips < 10 or game.p2.chips < 10:
+                game.p1.chips = game.p2.chips = 100
+            game.roll_dice()
+            game.state = "dice"
+            return None
+        if op == "deal":
+            if game.state != "dice" or game.dice_p1 == game.dice_p2:
+                return "roll the dice first"
+            await self.run(table, game.new_hand)
+            return None
+        if op not in ("check", "call", "raise", "fold"):
+            return f"unknown op {op!r}"
+        if game.state != "playing" or table.to_act() != seat:
+            return "not your turn"
+        amount = msg.get("amount", 0)
+        # JSON numbers may be floats, huge or booleans; only whole chips are bet
+        if type(amount) is not int or not 0 <= amount <= MAX_AMOUNT:
+            return f"amount must be a whole number of chips from 0 to {MAX_AMOUNT}"
+        if seat == 1:
+            ok = game.remote_action(op, amount)
+        else:
+            action = {
+                "check": game.player_check,
+                "call": game.player_call,
+                "raise": lambda: game.player_raise(amount),
+                "fold": game.player_fold,
+            }[op]
+            ok = await self.run(table, action)
+        if not ok:
+            return f"{op} is not allowed now"
+        self.actions += 1
+        return None
+
+    async def run(self, table, fn):
+        """Engine call, off the event loop when the computer may have to think"""
+        if table.mode == "human":
+            try:
+                return fn()
+            except AwaitingSeat:
+                return True
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn)
+
+    async def reap(self):
+        """Close tables nobody has touched for idle_timeout seconds"""
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 60))
+            cutoff = time.monotonic() - self.idle_timeout
+            for table in [t for t in self.tables.values() if t.touched < cutoff]:
+                for conn in table.conns:
+                    if conn is not None:
+                        conn.send({"push": "closed", "reason": "idle"})
+                        conn.writer.close()
+                        self.leave(conn)
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE)
+        self.reaper = asyncio.ensure_future(self.reap())
+        return server
+
+
+async def serve(host, port, **options):
+    duel = DuelServer(**options)
+    server = await duel.start(host, port)
+    print(f"serving on {', '.join(str(s.getsockname()) for s in server.sockets)}", flush=True)
+    async with server:
+        while True:
+            await asyncio.sleep(30)
+            print(f"{len(duel.tables)} tables, {duel.actions:,} actions", flush=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Multi-table Texas Duel server (line-delimited JSON over TCP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-tables", type=int, default=20000)
+    parser.add_argument("--cpu-budget-ms", type=float, default=CPU_BUDGET_MS,
+                        help="Monte Carlo budget per computer decision without a strategy table")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, max_tables=args.max_tables, cpu_budget_ms=args.cpu_budget_ms))
+    except KeyboardInterrupt:
+        pass
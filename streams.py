@@ -0,0 +1,79 @@
+import random
+import secrets
+import sys
+import time
+
+
+# Columns of a bulk deal: Player 1's hole cards, Player 2's, then the five
+# board cards, each an index into engine.CARDS (suit * 13 + rank)
+P1_HOLE = slice(0, 2)
+P2_HOLE = slice(2, 4)
+BOARD = slice(4, 9)
+DEAL_CARDS = 9
+CHUNK = 1 << 18  # deals shuffled per pass, bounding the scratch array to 13 MiB
+
+
+class RngStream(random.Random):
+    """random.Random that remembers its seed and derives child streams from it
+
+    The seed is kept as a string key; spawn() hands out streams seeded
+    with key/0, key/1, ... so a parent seed fixes every stream under it
+    while siblings stay independent (string seeds go through SHA-512).
+    Without a seed one is drawn from the OS and kept in key, so any run
+    can be replayed.
+    """
+    def __init__(self, seed=None):
+        self.key = str(secrets.randbits(64) if seed is None else seed)
+        self.children = 0
+        super().__init__(self.key)
+
+    def spawn(self, n=1):
+        """n new independent child streams"""
+        first, self.children = self.children, self.children + n
+        return [RngStream(f"{self.key}/{i}") for i in range(first, first + n)]
+
+    def numpy(self):
+        """A NumPy Generator seeded from this stream"""
+        import numpy as np
+        return np.random.default_rng(self.getrandbits(128))
+
+
+def deal_bulk(n, rng=None):
+    """n shuffled deals as an (n, 9) uint8 array of card indices, see P1_HOLE, P2_HOLE and BOARD
+
+    Each row is the first nine cards of an independent uniform shuffle,
+    done as a partial Fisher-Yates over all rows at once. rng is an
+    RngStream (or a seed for one); the same stream state gives the same
+    deals. Needs numpy, which the game itself does not.
+    """
+    import numpy as np
+    if not isinstance(rng, RngStream):
+        rng = RngStream(rng)
+    gen = rng.numpy()
+    out = np.empty((n, DEAL_CARDS), dtype=np.uint8)
+    for start in range(0, n, CHUNK):
+        m = min(CHUNK, n - start)
+        deck = np.tile(np.arange(52, dtype=np.uint8), (m, 1))
+        rows = np.arange(m)
+        for k in range(DEAL_CARDS):
+            j = gen.integers(k, 52, size=m)
+            picked = deck[rows, j]
+            deck[rows, j] = deck[:, k]
+            deck[:, k] = picked
+        out[start:start + m] = deck[:, :DEAL_CARDS]
+    return out
+
+
+if __name__ == "__main__":
+    # python streams.py [deals] [seed]: time deal_bulk and check the card frequencies
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    seed = sys.argv[2] if len(sys.argv) > 2 else 0
+    import numpy as np
+    start = time.perf_counter()
+    deals = deal_bulk(n, seed)
+    elapsed = time.perf_counter() - start
+    print(f"{n:,} deals in {elapsed * 1000:.0f} ms ({n / elapsed:,.0f} deals/s)")
+    assert all(len(set(row)) == DEAL_CARDS for row in deals[:10000].tolist()), "repeated card in a deal"
+    counts = np.bincount(deals.ravel(), minlength=52) / (n * DEAL_CARDS / 52)
+    print(f"card frequency / expected: min {counts.min():.4f}  max {counts.max():.4f}")
+    print("same seed, same deals:", bool((deal_bulk(n, seed) == deals).all()))
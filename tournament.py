@@ -0,0 +1,145 @@
+import argparse
+import hashlib
+import io
+import math
+import multiprocessing
+import time
+from array import array
+
+from engine import Game
+from history import HistoryFile
+import engine
+import mcts
+
+
+BIG_BLIND = 10  # There are no blinds, so the minimum raise is the unit for bb/100
+
+
+# Strategies for Player.strategy: fn(game, player) -> log message.
+# None plays Game.cpu_action's own logic, the CFR table when one is built.
+def passive(game, player):
+    return game.act(player, "call")
+
+def aggressive(game, player):
+    return game.act(player, "raise", 20)
+
+def thresholds(game, player):
+    return game.threshold_action(player)
+
+STRATEGIES = {
+    "cpu": None,
+    "thresholds": thresholds,
+    "passive": passive,
+    "aggressive": aggressive,
+    # A fixed number of iterations rather than a time budget, so results replay
+    "mcts": mcts.Searcher(budget_ms=None, iterations=mcts.ITERATIONS),
+}
+
+
+def play_batch(task):
+    """Play one batch of hands with its own RNG stream, return seat A's chip result per hand
+
+    Both seats are driven through the same new_hand -> cpu_action ->
+    cpu_respond/next_round -> end_showdown/end_game_due_to_fold path the
+    GUI uses. Seat A plays Player 1 in even batches and Player 2 in odd
+    ones so the betting order does not favour either strategy. With
+    record set, the hands' history records come back too.
+    """
+    index, hands, seed, a, b, samples, record = task
+    sink = io.BytesIO() if record else None
+    game = Game(cpu_budget_ms=None, cpu_samples=samples, history_sink=sink, seed=f"{seed}:{index}")
+    swap = index % 2 == 1
+    seat_a, seat_b = (game.p2, game.p1) if swap else (game.p1, game.p2)
+    seat_a.strategy, seat_b.strategy = STRATEGIES[a], STRATEGIES[b]
+    results = array("i")
+    for _ in range(hands):
+        # Same rule as the CONTINUE button
+        if game.p1.chips < 10 or game.p2.chips < 10:
+            game.p1.chips = game.p2.chips = 100
+        before = seat_a.chips
+        while not game.roll_dice():
+            pass
+        game.new_hand()
+        while game.state == "playing":
+            game.add_log(game.cpu_action(player=game.p1))
+            if game.p1.folded:
+                game.end_game_due_to_fold()
+            else:
+                game.cpu_respond()
+        results.append(seat_a.chips - before)
+    return index, results.tobytes(), sink.getvalue() if record else b""
+
+
+class Stats:
+    """Running totals of seat A's per-hand results"""
+    def __init__(self):
+        self.hands = self.wins = self.losses = 0
+        self.total = self.total_sq = 0
+
+    def add(self, results):
+        for r in results:
+            self.wins += r > 0
+            self.losses += r < 0
+        self.hands += len(results)
+        self.total += sum(results)
+        self.total_sq += sum(r * r for r in results)
+
+    def report(self):
+        n = self.hands
+        mean = self.total / n
+        sd = math.sqrt(max(self.total_sq / n - mean * mean, 0))
+        bb100 = mean / BIG_BLIND * 100
+        bb100_ci = 1.96 * sd / math.sqrt(n) / BIG_BLIND * 100
+        win = self.wins / n
+        win_ci = 1.96 * math.sqrt(win * (1 - win) / n)
+        return (f"hands {n:,}  won {win:.2%} ± {win_ci:.2%}  lost {self.losses / n:.2%}  "
+                f"bb/100 {bb100:+.2f} ± {bb100_ci:.2f}")
+
+
+def run(hands, a, b, seed=0, workers=None, batch=1000, samples=64, results_path=None, history_path=None):
+    tasks = []
+    for index, start in enumerate(range(0, hands, batch)):
+        tasks.append((index, min(batch, hands - start), seed, a, b, samples, bool(history_path)))
+    stats = Stats()
+    digest = hashlib.sha256()
+    out = open(results_path, "wb") if results_path else None
+    hist = HistoryFile(history_path) if history_path else None
+    started = time.time()
+    with multiprocessing.Pool(workers) as pool:
+        # imap keeps batch order, so the digest and results file do not depend on scheduling
+        for index, raw, records in pool.imap(play_batch, tasks):
+            results = array("i")
+            results.frombytes(raw)
+            stats.add(results)
+            digest.update(raw)
+            if out:
+                out.write(raw)
+            if hist:
+                hist.write(records)
+            if (index + 1) % 50 == 0:
+                print(f"{stats.report()}  ({stats.hands / (time.time() - started):,.0f} hands/s)", flush=True)
+    if out:
+        out.close()
+    if hist:
+        hist.close()
+    elapsed = time.time() - started
+    print(f"{a} vs {b}: {stats.report()}")
+    print(f"{elapsed:.1f}s, {stats.hands / elapsed:,.0f} hands/s, results sha256 {digest.hexdigest()[:16]}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Self-play tournament between two CPU strategies")
+    parser.add_argument("--hands", type=int, default=100000)
+    parser.add_argument("-a", default="cpu", choices=STRATEGIES)
+    parser.add_argument("-b", default="passive", choices=STRATEGIES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--batch", type=int, default=1000, help="hands per batch and RNG stream")
+    parser.add_argument("--samples", type=int, default=64, help="Monte Carlo samples per cpu decision")
+    parser.add_argument("--results", help="write seat A's per-hand results as int32 to this file")
+    parser.add_argument("--history", help="append every hand to this hand history file (see history.py)")
+    args = parser.parse_args()
+    if engine.PREFLOP is None:
+        print("note: no preflop_equity.bin, first-street decisions use Monte Carlo")
+    run(args.hands, args.a, args.b, args.seed, args.workers, args.batch, args.samples, args.results, args.history)